@@ -1,13 +1,113 @@
 import streamlit as st
-import pandas as pd
-from experta import *
 import time
 import os
+import atexit
 import base64
+import bisect
+import collections
+import contextlib
+import functools
+import hashlib
+import heapq
+import importlib
+import itertools
+import json
 import logging
+import logging.handlers
+import multiprocessing.util
+import queue
+import sqlite3
+import sys
+import threading
+import weakref
+
+try:
+    import fcntl
+except ImportError:  # Windows: catalog writes are only locked within the process
+    fcntl = None
+
+import static_assets
+
+class DeferredModule:
+    """Stands in for a module and imports it when one of its attributes is
+    first used. pandas and NumPy take most of this file's import time, and
+    the welcome page (and the first render of every new worker) needs
+    neither."""
+    def __init__(self, name):
+        self.__module_name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__module_name)
+        # Later lookups find the module's attributes without this hook.
+        self.__dict__.update(vars(module))
+        return getattr(module, attr)
+
+pd = DeferredModule("pandas")
+np = DeferredModule("numpy")
 
 # إعداد السجل لتتبع الأخطاء في ملف
-logging.basicConfig(filename='app.log', level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+class LogPipeline:
+    """Hands log records to a background thread that writes them to a rotating file.
+
+    Request threads only put records on a queue, so they never wait on disk.
+    Configured through ADVISOR_LOG_LEVEL (default INFO), ADVISOR_LOG_FILE
+    (default app.log), ADVISOR_LOG_MAX_BYTES / ADVISOR_LOG_BACKUPS for
+    size-based rotation, or ADVISOR_LOG_ROTATE_WHEN (e.g. "midnight") for
+    time-based rotation instead.
+    """
+    def __init__(self, env=os.environ):
+        self.level = logging.getLevelName(env.get("ADVISOR_LOG_LEVEL", "INFO").upper())
+        if not isinstance(self.level, int):
+            self.level = logging.INFO
+        path = env.get("ADVISOR_LOG_FILE", "app.log")
+        backups = int(env.get("ADVISOR_LOG_BACKUPS", 5))
+        when = env.get("ADVISOR_LOG_ROTATE_WHEN")
+        if when:
+            self.file_handler = logging.handlers.TimedRotatingFileHandler(
+                path, when=when, backupCount=backups, encoding="utf-8", delay=True)
+        else:
+            self.file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=int(env.get("ADVISOR_LOG_MAX_BYTES", 10 * 1024 * 1024)),
+                backupCount=backups, encoding="utf-8", delay=True)
+        self.file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        self.listener = None
+
+    def start(self):
+        self.listener = logging.handlers.QueueListener(self.queue, self.file_handler)
+        self.listener.start()
+        # Replaces any handlers installed before us. experta calls
+        # logging.basicConfig() on import, which is a no-op once this
+        # handler is installed; see rule_engine.py for its watchers.
+        root = logging.getLogger()
+        root.handlers[:] = [self.queue_handler]
+        root.setLevel(self.level)
+        atexit.register(self.stop)
+        # A forked worker (e.g. batch_advise.py) inherits the queue but not the
+        # writer thread: give it its own queue and thread, flushed on worker exit.
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._restart_in_child)
+        return self
+
+    def _restart_in_child(self):
+        self.queue = queue.SimpleQueue()
+        self.queue_handler.queue = self.queue
+        self.listener = logging.handlers.QueueListener(self.queue, self.file_handler)
+        self.listener.start()
+        multiprocessing.util.Finalize(self, self.stop, exitpriority=1)
+
+    def stop(self):
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+@st.cache_resource
+def get_log_pipeline():
+    return LogPipeline().start()
+
+get_log_pipeline()
 logger = logging.getLogger(__name__)
 
 # Function to convert file to Base64
@@ -24,296 +124,1578 @@ def get_file_as_base64(file_path):
         logger.error(f"Error reading file {file_path}: {str(e)}")
         return None
 
-# Load the background image
-background_image_path = "111.png"
-try:
-    img = get_file_as_base64(background_image_path)
-except FileNotFoundError:
-    st.error(f"Background image '{background_image_path}' not found in the project folder. Please ensure the image is in the correct directory.")
-    img = ""
-
-# CSS for background and styling with click animation
-st.markdown(f"""
-    <style>
-    [data-testid="stAppViewContainer"] {{
-        background-image: url("data:image/png;base64,{img}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-        min-height: 100vh;
-    }}
-    [data-testid="stHeader"] {{
-        background: rgba(0, 0, 0, 0);
-    }}
-    [data-testid="stToolbar"] {{
-        right: 2rem;
-    }}
-    [data-testid="stSidebar"] {{
-        background-image: url("data:image/png;base64,{img}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    body {{
-        background-color: transparent !important;
-        color: #ffffff;
-    }}
-    h1 {{
-        color: #ffffff;
-        text-align: center;
-        font-weight: 700;
-        text-shadow: 2px 2px 4px #000000;
-        padding-bottom: 8px;
-    }}
-    h2, h3 {{
-        color: #ffffff;
-        text-shadow: 2px 2px 4px #000000;
-        padding-bottom: 8px;
-    }}
-    .stButton>button {{
-        background-color: #1a3c34;
-        color: white;
-        border-radius: 8px;
-        padding: 10px 20px;
-        font-size: 16px;
-        transition: all 0.3s ease;
-        width: 100%;
-        border: 1px solid #444444;
-    }}
-    .stButton>button:hover {{
-        background-color: #14524a;
-        transform: scale(1.02);
-    }}
-    .stButton>button:active {{
-        transform: scale(0.95);
-        background-color: #0f2e28;
-        transition: transform 0.1s ease, background-color 0.1s ease;
-    }}
-    .stSelectbox, .stNumberInput, .stMultiSelect, .stTextInput {{
-        background-color: rgba(68, 68, 68, 0.9);
-        border-radius: 5px;
-        border: 1px solid #d1d5db;
-        padding: 5px;
-        color: #ffffff;
-    }}
-    div[data-baseweb="select"] > label,
-    div[data-baseweb="input"] > label,
-    div[data-testid="stMultiSelect"] > label {{
-        color: #ffffff !important;
-        text-shadow: none;
-    }}
-    .stDataFrame {{
-        border: 2px solid #4CAF50 !important;
-        border-radius: 10px !important;
-        background-color: rgba(30, 30, 30, 0.9) !important;
-        color: #ffffff !important;
-    }}
-    .stDataFrame th {{
-        background-color: #2e3b3e !important;
-        color: #ffffff !important;
-        font-weight: bold !important;
-        border-bottom: 2px solid #4CAF50 !important;
-        padding: 10px !important;
-    }}
-    .stDataFrame td {{
-        background-color: rgba(40, 40, 40, 0.8) !important;
-        color: #ffffff !important;
-        padding: 8px !important;
-        border: 1px solid #444444 !important;
-    }}
-    .st-expander {{
-        background-color: rgba(30, 30, 30, 0.95) !important;
-        border: 2px solid #4CAF50 !important;
-        border-radius: 10px !important;
-        margin-top: 20px !important;
-    }}
-    .stExpander .stMarkdown {{
-        color: #e0e0e0 !important;
-    }}
-    .stExpander .stMarkdown strong {{
-        color: #4CAF50 !important;
-        font-size: 16px !important;
-    }}
-    .stSidebar .stSelectbox {{
-        background-color: rgba(68, 68, 68, 0.9);
-    }}
-    .stInfo, .stWarning, .stError {{
-        border-radius: 5px;
-        background-color: rgba(68, 68, 68, 0.9);
-        color: #ffffff;
-    }}
-    .stMetric {{
-        background-color: rgba(30, 70, 40, 0.8) !important;
-        border: 2px solid #4CAF50 !important;
-        border-radius: 10px !important;
-        color: white !important;
-    }}
-    .stMetric label {{
-        color: white !important;
-        font-weight: bold !important;
-    }}
-    .stMetric div {{
-        color: #4CAF50 !important;
-        font-size: 24px !important;
-        font-weight: bold !important;
-    }}
-    @media (max-width: 600px) {{
-        .stButton>button {{
-            font-size: 14px;
-            padding: 8px 16px;
-        }}
-        h1 {{
-            font-size: 24px;
-        }}
-    }}
-    .recommended-card {{
-        background-color: rgba(30, 70, 40, 0.8);
-        border-radius: 8px;
-        padding: 12px;
-        margin-bottom: 10px;
-        border-left: 4px solid #4CAF50;
-        color: #e0ffe0;
-    }}
-    .unavailable-card {{
-        background-color: rgba(70, 30, 30, 0.8);
-        border-radius: 8px;
-        padding: 12px;
-        margin-bottom: 10px;
-        border-left: 4px solid #ff5252;
-        color: #ffe0e0;
-    }}
-    .admin-button-container {{
-        margin-top: 30px;
-        padding: 10px;
-    }}
-    </style>
-""", unsafe_allow_html=True)
+# Stylesheet and background image are published once per process as
+# content-hashed static files (see static_assets.py), so each rerun only
+# sends a one-line @import instead of the base64-encoded image.
+@st.cache_resource
+def get_static_assets():
+    try:
+        return static_assets.build()
+    except Exception as e:
+        logger.error(f"Error publishing static assets: {str(e)}")
+        return None
+
+def apply_styles():
+    manifest = get_static_assets() if st.get_option("server.enableStaticServing") else None
+    if manifest is None:
+        st.markdown(static_assets.inline_stylesheet_tag(), unsafe_allow_html=True)
+    else:
+        st.markdown(static_assets.stylesheet_tag(manifest), unsafe_allow_html=True)
 
 # ExplanationSystem Class
+class Explanation(collections.namedtuple("Explanation", "course kind reasons unmet course_level student_level")):
+    """One explanation record. ``kind`` is ``failed`` (recommended retake),
+    ``new`` (recommended, ``reasons`` are its prerequisites) or ``unmet``
+    (unavailable, ``unmet`` lists the missing prerequisites)."""
+    __slots__ = ()
+    RECOMMENDED = ("failed", "new")
+
+    @property
+    def message(self):
+        if self.kind == "failed":
+            return (f"{self.course} is recommended because you failed it previously and its prerequisites are met. "
+                    f"Course Level: {self.course_level}, Your Level: {self.student_level}.")
+        if self.kind == "new":
+            return (f"{self.course} is recommended because you passed its prerequisites: "
+                    f"{', '.join(self.reasons) if self.reasons else 'None'}. "
+                    f"Course Level: {self.course_level}, Your Level: {self.student_level}.")
+        return f"{self.course} is not available due to unmet prerequisites: {', '.join(self.unmet)}."
+
 class ExplanationSystem:
+    """Explanation records of one advising request, in insertion order and
+    without duplicates. Sources registered with ``defer()`` (unavailable
+    courses) only run when the records are first read, or when ``display()``
+    is asked to include them."""
     def __init__(self):
-        self.explanations = []
+        self._records = {}
+        self._deferred = []
 
-    def add_explanation(self, message):
+    def add(self, record):
         try:
-            self.explanations.append(message)
-            logger.debug(f"Added explanation: {message}")
+            self._records.setdefault(record)
+            logger.debug("Added explanation: %s", record)
         except Exception as e:
             logger.error(f"Error adding explanation: {str(e)}")
 
-    def display(self):
-        if not self.explanations:
-            st.info("No explanations available at this time.")
+    def defer(self, source):
+        """Register a callable yielding more records on demand."""
+        self._deferred.append(source)
+
+    def _resolve(self):
+        while self._deferred:
+            for record in self._deferred.pop(0)():
+                self._records.setdefault(record)
+
+    @property
+    def records(self):
+        self._resolve()
+        return list(self._records)
+
+    @property
+    def explanations(self):
+        return [record.message for record in self.records]
+
+    def state(self):
+        """Everything needed to rebuild this system later (see ``restore()``)."""
+        return tuple(self._records), tuple(self._deferred)
+
+    def restore(self, state):
+        records, deferred = state
+        for record in records:
+            self._records.setdefault(record)
+        self._deferred.extend(deferred)
+
+    def display(self, include_unavailable=True):
+        if include_unavailable:
+            self._resolve()
+        recommended = [r for r in self._records if r.kind in Explanation.RECOMMENDED]
+        unavailable = [r for r in self._records if r.kind == "unmet"]
+        if not recommended and not unavailable:
+            if include_unavailable or not self._deferred:
+                st.info("No explanations available at this time.")
+            return
+
+        if recommended:
+            st.markdown("### ✅ Recommended Courses")
+            for record in recommended:
+                st.markdown(f"""
+                <div class="recommended-card">
+                    {record.message}
+                </div>
+                """, unsafe_allow_html=True)
+
+        if unavailable:
+            st.markdown("### ❌ Unavailable Courses")
+            for record in unavailable:
+                st.markdown(f"""
+                <div class="unavailable-card">
+                    {record.message}
+                </div>
+                """, unsafe_allow_html=True)
+
+def unavailable_explanations(index, semester, track, passed_mask, offered=None):
+    """Records for the offered courses whose prerequisites are unmet, newest
+    first (the order the engine's rules always used). ``offered`` may carry
+    the ``(rows, prereqs_met)`` pair the recommender already computed."""
+    if offered is None:
+        offered = index.offered_prereqs_met(semester, track, index.id_array(passed_mask))
+    rows, prereqs_met = offered
+    for cid in reversed(rows[~prereqs_met].tolist()):
+        unmet = tuple(p for p in index.prereq_codes[cid] if not passed_mask >> index.ids[p] & 1)
+        yield Explanation(index.codes[cid], "unmet", (), unmet, None, None)
+
+# CatalogCache Class
+class CatalogSnapshot:
+    """One normalized catalog version, shared read-only by every session.
+
+    Callers must never mutate ``df`` in place; copy it first. ``generation``
+    is unique per snapshot in this process, so it identifies the catalog a
+    cached result was computed from.
+    """
+    _generations = itertools.count(1)
+
+    def __init__(self, df, version, dependencies=None):
+        self.df = df
+        self.version = version
+        self.generation = next(self._generations)
+        self._dependencies = dependencies
+        self._lock = threading.Lock()
+
+    @property
+    def dependencies(self):
+        with self._lock:
+            if self._dependencies is None:
+                self._dependencies = DependencyIndex(self.df)
+            return self._dependencies
+
+class DependencyIndex:
+    """Forward and reverse prerequisite/co-requisite edges of a catalog.
+
+    Built once when a catalog is loaded, then updated in place by each
+    successful add, edit and delete (under the store lock), so checking a
+    course's references or what depends on it costs O(degree) rather than
+    a catalog scan. It always describes the latest saved catalog; snapshots
+    created by edits share it.
+    """
+    KINDS = (("pre", "Prerequisites"), ("co", "CoRequisites"))
+
+    def __init__(self, df):
+        self.requires = {}
+        self.required_by = collections.defaultdict(set)
+        for code, prereqs, coreqs in zip(df["CourseCode"].tolist(), df["Prerequisites"].tolist(),
+                                         df["CoRequisites"].tolist()):
+            self._link(str(code), {"Prerequisites": prereqs, "CoRequisites": coreqs})
+
+    @classmethod
+    def references(cls, course):
+        return {kind: [ref.strip() for ref in str(course.get(column) or "").split(",") if ref.strip()]
+                for kind, column in cls.KINDS}
+
+    def _link(self, code, course):
+        refs = self.references(course)
+        self.requires[code] = refs
+        for kind, codes in refs.items():
+            for ref in codes:
+                self.required_by[ref].add((code, kind))
+
+    def _unlink(self, code):
+        for kind, codes in self.requires.pop(code, {}).items():
+            for ref in codes:
+                dependents = self.required_by.get(ref)
+                if dependents is not None:
+                    dependents.discard((code, kind))
+                    if not dependents:
+                        del self.required_by[ref]
+
+    def __contains__(self, code):
+        return code in self.requires
+
+    def __len__(self):
+        return len(self.requires)
+
+    def dependents(self, code):
+        """Courses that list ``code`` as a prerequisite or co-requisite, as
+        sorted (course, "pre" | "co") pairs."""
+        return sorted(self.required_by.get(code, ()))
+
+    def prerequisite_path(self, start, goal):
+        """Shortest chain start -> ... -> goal where each course lists the next
+        as a prerequisite, or None. Visits only courses ``start`` requires."""
+        parents = {start: None}
+        queue = collections.deque([start])
+        while queue:
+            code = queue.popleft()
+            for ref in self.requires.get(code, {}).get("pre", ()):
+                if ref in parents:
+                    continue
+                parents[ref] = code
+                if ref == goal:
+                    path = [ref]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    return path[::-1]
+                queue.append(ref)
+        return None
+
+    def unknown_references(self, course):
+        """References in ``course`` that are not catalog courses."""
+        return [(kind, ref) for kind, codes in self.references(course).items()
+                for ref in codes if ref not in self.requires]
+
+    def apply(self, op, code, course=None):
+        self._unlink(code)
+        if op != "delete":
+            self._link(code, course)
+
+class CatalogCache:
+    """Process-wide cache of parsed catalogs keyed by catalog store.
+
+    A cached snapshot is reused while the store's stamp (cheap: file
+    mtime/size, or the SQLite catalog version) is unchanged; when only the
+    stamp changed, the content version decides. ``put()`` installs a frame
+    the caller already holds (after an edit or compaction) without reading
+    the store again; ``bump()`` forces the next ``get()`` to re-read it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def get(self, store):
+        path = store.key
+        with self._lock:
+            stat = store.stamp()
+            entry = self._entries.get(path)
+            if entry is not None and entry["stat"] == stat:
+                self.hits += 1
+                logger.debug("Catalog cache hit for %s (hits=%d, misses=%d, reloads=%d)", path, self.hits, self.misses, self.reloads)
+                return entry["snapshot"]
+
+            content_hash = store.content_version()
+            if entry is not None and entry["snapshot"].version[1] == content_hash:
+                # Touched but unchanged: keep the snapshot, remember the new mtime.
+                entry["stat"] = stat
+                self.hits += 1
+                logger.debug("Catalog cache hit for %s after mtime change (hits=%d, misses=%d, reloads=%d)", path, self.hits, self.misses, self.reloads)
+                return entry["snapshot"]
+
+            if path in self._entries:
+                self.reloads += 1
+            else:
+                self.misses += 1
+            snapshot = CatalogSnapshot(store.read(), (stat[0], content_hash))
+            self._entries[path] = {"stat": stat, "snapshot": snapshot}
+            logger.info(f"Catalog cache loaded {path} version {content_hash[:12]} (hits={self.hits}, misses={self.misses}, reloads={self.reloads})")
+            return snapshot
+
+    def put(self, store, df, dependencies=None, stamp=None):
+        with self._lock:
+            stat = stamp if stamp is not None else store.stamp()
+            snapshot = CatalogSnapshot(df, (stat[0], None), dependencies)
+            self._entries[store.key] = {"stat": stat, "snapshot": snapshot}
+            return snapshot
+
+    def bump(self, path):
+        with self._lock:
+            if self._entries.get(path) is not None:
+                # Keep the key so the next load is counted as a reload.
+                self._entries[path] = None
+                logger.info(f"Catalog cache version bumped for {path}")
+
+@st.cache_resource
+def get_catalog_cache():
+    return CatalogCache()
+
+def _write_atomic(path, write):
+    """Write a file through a temporary sibling and rename it into place, so
+    readers and crashes only ever see the old or the new content."""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.tmp{os.getpid()}")
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(directory)
+
+def _fsync_directory(directory):
+    # Makes a rename or a new file durable; not supported on Windows.
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class CatalogFileLock:
+    """Re-entrant lock for a CSV catalog that also excludes other processes.
+
+    The outermost ``with`` takes a thread lock and then an exclusive
+    ``fcntl.flock`` on ``path`` (a sidecar ``courses.csv.lock`` file), so
+    edits and compactions from the app, batch workers and the API never
+    interleave. Readers do not take it.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                f = open(self.path, "a", encoding="utf-8")
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                except BaseException:
+                    f.close()
+                    raise
+            except BaseException:
+                self._lock.release()
+                raise
+            self._file = f
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            # Closing the file releases the flock.
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+def _json_default(value):
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+# CatalogJournal Class
+class CatalogJournal:
+    """Append-only log of catalog edits next to the CSV (``courses.csv.journal``).
+
+    Each add/edit/delete is one JSON line, fsynced before the edit is
+    reported as saved, so an edit costs O(1) I/O instead of a full CSV
+    rewrite. Loading replays the journal over the CSV. ``compact()``
+    atomically rewrites the CSV and empties the journal; an edit runs it once
+    the journal exceeds ADVISOR_JOURNAL_MAX_BYTES (default 1 MiB) or its
+    oldest entry is older than ADVISOR_JOURNAL_MAX_AGE seconds (default
+    3600). Loading never compacts.
+
+    Appends and compactions hold ``lock`` (a CatalogFileLock), and a
+    compaction rebuilds the catalog from the files under that lock, so it
+    keeps the edits that other processes have appended.
+
+    An edit of a course that is no longer in the catalog is skipped, like
+    the SQLite store's UPDATE. Replaying an entry sets, updates or removes
+    a whole row, so replaying a journal over a CSV that already contains it
+    (a crash between the CSV rename and the journal truncation) gives the
+    same catalog.
+    """
+    def __init__(self, csv_file, max_bytes=None, max_age=None):
+        self.csv_file = csv_file
+        self.path = self.path_for(csv_file)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.environ.get("ADVISOR_JOURNAL_MAX_BYTES", 1 << 20))
+        self.max_age = max_age if max_age is not None else float(os.environ.get("ADVISOR_JOURNAL_MAX_AGE", 3600))
+        self.lock = CatalogFileLock(f"{csv_file}.lock")
+        self.compactions = 0
+        self._tail_checked = False
+
+    @staticmethod
+    def path_for(csv_file):
+        return f"{csv_file}.journal"
+
+    def append(self, op, code, course=None):
+        entry = {"ts": time.time(), "op": op, "code": code}
+        if course is not None:
+            entry["course"] = course
+        line = json.dumps(entry, default=_json_default) + "\n"
+        with self.lock:
+            created = not os.path.exists(self.path)
+            if not created and not self._tail_checked:
+                self._truncate_torn_tail()
+            self._tail_checked = True
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            if created:
+                _fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+
+    def _truncate_torn_tail(self):
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                f.flush()
+                os.fsync(f.fileno())
+                logger.warning(f"Truncated incomplete last entry in {self.path}")
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                if number == len(lines):
+                    # A write torn by a crash is never acknowledged; drop it.
+                    logger.warning(f"Ignoring incomplete last entry in {self.path}")
+                else:
+                    raise ValueError(f"Corrupt entry on line {number} of {self.path}")
+        return entries
+
+    def replay(self, df):
+        entries = self.entries()
+        if not entries:
+            return df
+        columns = list(df.columns)
+        rows = {row["CourseCode"]: row for row in df.to_dict("records")}
+        for entry in entries:
+            code = entry["code"]
+            if entry["op"] == "delete":
+                rows.pop(code, None)
+            elif entry["op"] == "edit":
+                if code in rows:
+                    rows[code].update(entry["course"])
+                else:
+                    # Deleted in the meantime (e.g. by another process); an edit
+                    # does not bring a course back, as in the SQLite store.
+                    logger.warning(f"Skipping journal edit of missing course {code} in {self.path}")
+            else:
+                row = rows.get(code, {})
+                row.update(entry["course"])
+                row["CourseCode"] = code
+                rows[code] = row
+        logger.info(f"Replayed {len(entries)} journal entries from {self.path}")
+        return pd.DataFrame(list(rows.values()), columns=columns)
+
+    def needs_compaction(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return False
+        if size == 0:
+            return False
+        if size >= self.max_bytes:
+            return True
+        with open(self.path, encoding="utf-8") as f:
+            first = f.readline()
+        try:
+            return time.time() - json.loads(first)["ts"] >= self.max_age
+        except (ValueError, KeyError):
+            return True
+
+    def compact(self, df=None):
+        """Write ``df`` (default: the CSV with the journal replayed) to the CSV
+        (write-temp-then-rename) and empty the journal."""
+        with self.lock:
+            if df is None:
+                df = self.replay(KnowledgeBase._read_csv(self.csv_file))
+            _write_atomic(self.csv_file, lambda f: df.to_csv(f, index=False))
+            if os.path.exists(self.path):
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self.compactions += 1
+            self._tail_checked = True
+        logger.info(f"Compacted {self.path} into {self.csv_file} (compactions={self.compactions})")
+
+@st.cache_resource
+def get_catalog_journal(csv_file):
+    return CatalogJournal(csv_file)
+
+# Catalog stores
+class CsvCatalogStore:
+    """A catalog kept as a CSV file plus its edit journal (see CatalogJournal)."""
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        self.key = csv_file
+        self.label = csv_file
+        self.journal = get_catalog_journal(csv_file)
+        self.lock = self.journal.lock
+
+    def exists(self):
+        return os.path.exists(self.csv_file)
+
+    def stamp(self):
+        st_info = os.stat(self.csv_file)
+        stamp = (st_info.st_mtime_ns, st_info.st_size)
+        try:
+            journal_info = os.stat(self.journal.path)
+            return stamp + (journal_info.st_mtime_ns, journal_info.st_size)
+        except FileNotFoundError:
+            return stamp
+
+    def content_version(self):
+        digest = hashlib.sha1()
+        for source in (self.csv_file, self.journal.path):
+            if not os.path.exists(source):
+                continue
+            with open(source, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def read(self):
+        return self.journal.replay(KnowledgeBase._read_csv(self.csv_file))
+
+    def record(self, op, code, course, base):
+        """Append one edit. Returns the new stamp if the catalog was still at
+        stamp ``base`` before the edit, else None."""
+        with self.lock:
+            current = self.stamp() == base
+            self.journal.append(op, code, course)
+            self.maintain()
+            return self.stamp() if current else None
+
+    def write_all(self, df):
+        self.journal.compact(df)
+
+    def maintain(self):
+        """Compact the journal if it is due; returns True if the files changed."""
+        with self.lock:
+            if self.journal.needs_compaction():
+                self.journal.compact()
+                return True
+        return False
+
+class SqliteCatalogStore:
+    """One program's catalog in an SQLite database that can hold many programs.
+
+    Courses are keyed by (program, code) and kept in catalog order
+    (``position``); the requisite strings are stored as written, so the
+    catalog reads back exactly as it was written. The app always reads a
+    whole program and queries it through CatalogIndex, so no other indexes
+    are kept. Every change runs in one
+    transaction and bumps the program's version, which is what the catalog
+    cache compares.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS programs (
+            program TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS courses (
+            program TEXT NOT NULL,
+            code TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            prerequisites TEXT NOT NULL DEFAULT '',
+            corequisites TEXT NOT NULL DEFAULT '',
+            credit_hours INTEGER NOT NULL,
+            semester TEXT NOT NULL,
+            track TEXT NOT NULL,
+            level NOT NULL,
+            PRIMARY KEY (program, code)
+        );
+        CREATE INDEX IF NOT EXISTS courses_position ON courses (program, position);
+        -- Unused indexes and edge table of earlier databases.
+        DROP INDEX IF EXISTS courses_track;
+        DROP INDEX IF EXISTS courses_level;
+        DROP INDEX IF EXISTS courses_semester;
+        DROP TABLE IF EXISTS requisites;
+    """
+    COLUMNS = {
+        "CourseCode": "code",
+        "CourseName": "name",
+        "Prerequisites": "prerequisites",
+        "CoRequisites": "corequisites",
+        "CreditHours": "credit_hours",
+        "SemesterOffered": "semester",
+        "Track": "track",
+        "Level": "level",
+    }
+
+    def __init__(self, db_path, program):
+        self.db_path = db_path
+        self.program = program
+        self.key = f"sqlite:{os.path.abspath(db_path)}#{program}"
+        self.label = f"{db_path} ({program})"
+        self.lock = threading.RLock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        # One short-lived connection per operation: Streamlit runs sessions
+        # on different threads and sqlite3 connections are per-thread.
+        return contextlib.closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self.lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("UPDATE programs SET version = version + 1 WHERE program = ?", (self.program,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def programs(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT program FROM programs ORDER BY program")]
+
+    def exists(self):
+        return self.stamp() is not None
+
+    def stamp(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT version FROM programs WHERE program = ?", (self.program,)).fetchone()
+        return None if row is None else (row[0],)
+
+    def content_version(self):
+        return f"{self.program}@{self.stamp()[0]}"
+
+    def read(self):
+        columns = ", ".join(self.COLUMNS.values())
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {columns} FROM courses WHERE program = ? ORDER BY position",
+                                (self.program,)).fetchall()
+        return pd.DataFrame(rows, columns=list(self.COLUMNS))
+
+    def _row_values(self, course):
+        return tuple(_json_default(course[col]) if hasattr(course[col], "item") else course[col]
+                     for col in list(self.COLUMNS)[1:])
+
+    def record(self, op, code, course, base):
+        """Apply one edit. Returns the new stamp if the catalog was still at
+        stamp ``base`` before the edit, else None."""
+        with self._transaction() as conn:
+            version = conn.execute("SELECT version FROM programs WHERE program = ?", (self.program,)).fetchone()[0]
+            if op == "delete":
+                conn.execute("DELETE FROM courses WHERE program = ? AND code = ?", (self.program, code))
+            else:
+                self._write_course(conn, op, code, course)
+        # BEGIN IMMEDIATE serializes writers, so this commit bumped the version by one.
+        return (version + 1,) if (version,) == base else None
+
+    def _write_course(self, conn, op, code, course):
+        course = dict(course, CourseCode=code)
+        if op == "edit":
+            conn.execute("UPDATE courses SET name = ?, prerequisites = ?, corequisites = ?, credit_hours = ?, "
+                         "semester = ?, track = ?, level = ? WHERE program = ? AND code = ?",
+                         self._row_values(course) + (self.program, code))
         else:
-            unique_explanations = []
-            seen = set()
-            for exp in self.explanations:
-                if exp not in seen:
-                    seen.add(exp)
-                    unique_explanations.append(exp)
-
-            recommended = []
-            unavailable = []
-
-            for exp in unique_explanations:
-                if "recommended" in exp.lower():
-                    recommended.append(exp)
-                elif "not available" in exp.lower():
-                    unavailable.append(exp)
-
-            if recommended:
-                st.markdown("### ✅ Recommended Courses")
-                for exp in recommended:
-                    st.markdown(f"""
-                    <div class="recommended-card">
-                        {exp}
-                    </div>
-                    """, unsafe_allow_html=True)
-
-            if unavailable:
-                st.markdown("### ❌ Unavailable Courses")
-                for exp in unavailable:
-                    st.markdown(f"""
-                    <div class="unavailable-card">
-                        {exp}
-                    </div>
-                    """, unsafe_allow_html=True)
+            position = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM courses WHERE program = ?",
+                                    (self.program,)).fetchone()[0]
+            conn.execute("INSERT INTO courses (program, code, position, name, prerequisites, corequisites, "
+                         "credit_hours, semester, track, level) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (self.program, code, position) + self._row_values(course))
+
+    def write_all(self, df):
+        with self.lock:
+            with self._connect() as conn:
+                conn.execute("INSERT OR IGNORE INTO programs (program) VALUES (?)", (self.program,))
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM courses WHERE program = ?", (self.program,))
+                for position, course in enumerate(df[list(self.COLUMNS)].to_dict("records")):
+                    code = str(course["CourseCode"])
+                    conn.execute("INSERT INTO courses (program, code, position, name, prerequisites, corequisites, "
+                                 "credit_hours, semester, track, level) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (self.program, code, position) + self._row_values(course))
+
+    def maintain(self):
+        return False
+
+    def import_csv(self, csv_file):
+        """Replace this program's catalog with a CSV file (same parsing as the app)."""
+        df = KnowledgeBase._read_csv(csv_file)
+        self.write_all(df)
+        logger.info(f"Imported {len(df)} courses from {csv_file} into {self.label}")
+        return df
+
+    def export_csv(self, csv_file):
+        df = self.read()
+        _write_atomic(csv_file, lambda f: df.to_csv(f, index=False))
+        logger.info(f"Exported {len(df)} courses from {self.label} to {csv_file}")
+        return df
+
+@st.cache_resource
+def get_sqlite_store(db_path, program):
+    return SqliteCatalogStore(db_path, program)
+
+def make_catalog_store(csv_file="courses.csv", kind=None, db_path=None, program=None):
+    """The store behind a KnowledgeBase.
+
+    ADVISOR_CATALOG_STORE picks ``csv`` (default: ``csv_file`` plus its
+    journal) or ``sqlite`` (program ADVISOR_PROGRAM, default "cse", in the
+    database ADVISOR_CATALOG_DB, default catalog.db). A program missing from
+    the database is seeded from ``csv_file``.
+    """
+    kind = kind or os.environ.get("ADVISOR_CATALOG_STORE", "csv")
+    if kind == "csv":
+        return CsvCatalogStore(csv_file)
+    if kind != "sqlite":
+        raise ValueError(f"Unknown catalog store '{kind}'; expected one of {', '.join(CATALOG_STORES)}")
+    store = get_sqlite_store(db_path or os.environ.get("ADVISOR_CATALOG_DB", "catalog.db"),
+                             program or os.environ.get("ADVISOR_PROGRAM", "cse"))
+    with store.lock:
+        if not store.exists() and os.path.exists(csv_file):
+            store.import_csv(csv_file)
+    return store
+
+CATALOG_STORES = {"csv": CsvCatalogStore, "sqlite": SqliteCatalogStore}
+
+# CatalogIndex Class
+SEMESTER_BITS = {"Fall": 1, "Spring": 2, "Both": 3}
+UNKNOWN_LEVEL = 127
+# Courses of this track are offered to every track.
+COMMON_TRACK = "All"
+
+def default_track(index):
+    """Track for requests that name none: ``ADVISOR_DEFAULT_TRACK``, else
+    the alphabetically first track of the catalog."""
+    configured = os.environ.get("ADVISOR_DEFAULT_TRACK")
+    if configured:
+        return configured
+    tracks = index.program_tracks
+    return tracks[0] if tracks else COMMON_TRACK
+
+def _level_number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return UNKNOWN_LEVEL
+
+def _enum(values):
+    """Distinct ``values`` in first-seen order, and each value's position
+    among them in the smallest integer dtype that fits."""
+    labels = list(dict.fromkeys(values))
+    positions = {value: i for i, value in enumerate(labels)}
+    dtype = np.int8 if len(labels) <= 127 else np.int16 if len(labels) <= 32767 else np.int32
+    return labels, np.array([positions[value] for value in values], dtype=dtype)
+
+class CourseColumn:
+    """Read-only per-course sequence computed on access from the compact
+    arrays of a ``CatalogIndex``, so no per-course Python objects are kept."""
+    __slots__ = ("_get", "_size")
+
+    def __init__(self, get, size):
+        self._get = get
+        self._size = size
+
+    def __getitem__(self, cid):
+        return self._get(cid)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return map(self._get, range(self._size))
+
+def _members(values, sorted_ids):
+    """Per value, whether it is in the sorted array ``sorted_ids`` (a
+    binary search, cheaper than ``np.isin`` for the few passed courses)."""
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.searchsorted(sorted_ids, values).clip(max=len(sorted_ids) - 1)
+    return sorted_ids[positions] == values
+
+class CatalogShard:
+    """The catalog rows of one track offered in one semester (ascending),
+    with their prerequisite edges gathered from the CSR arrays; ``owner``
+    is a position in ``rows``. Shards are built with the index, so every
+    session shares them."""
+    __slots__ = ("rows", "owner", "target")
+
+    def __init__(self, index, rows):
+        self.rows = rows
+        starts = index.prereq_ptr[rows]
+        counts = index.prereq_ptr[rows + 1] - starts
+        self.owner = np.repeat(np.arange(len(rows), dtype=np.int32), counts)
+        offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.target = index.prereq_ids[np.repeat(starts, counts) + offsets]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def prereqs_met(self, passed_ids):
+        """Per row, whether all its prerequisites are in ``passed_ids``."""
+        missing = ~_members(self.target, passed_ids)
+        return np.bincount(self.owner[missing], minlength=len(self.rows)) == 0
+
+class CatalogIndex:
+    """The catalog compiled to integer course IDs, typed arrays and bitsets.
+
+    Each course gets an ID equal to its row position; codes that are only
+    referenced as prerequisites/co-requisites get IDs after the catalog rows.
+    Codes are interned; level, semester and track are small-integer enums
+    into ``level_labels``/``semester_labels``/``tracks``; credits are int16.
+    Prerequisites and co-requisites are CSR adjacency arrays (``*_ptr``
+    offsets into ``*_ids``), so eligibility for the whole catalog is a
+    handful of NumPy operations. The rows offered to each (track, semester)
+    are precomputed as ``CatalogShard``s; a track's offering is its own
+    shard plus the common ("All") shard, which is stored once, so
+    per-request work scales with the student's track rather than the whole
+    catalog. ``prereq_codes``, ``prereq_masks``,
+    ``level_values`` and the like are ``CourseColumn`` views over these
+    arrays. Sets of courses (a student's passed or failed courses) are
+    Python ints used as bitsets. Build it through ``get_catalog_index()``
+    so every caller shares one index per catalog version.
+    """
+    def __init__(self, df):
+        self.size = size = len(df)
+        self.codes = [sys.intern(str(code)) for code in df["CourseCode"].tolist()]
+        self.ids = {code: cid for cid, code in enumerate(self.codes)}
+        self.names = df["CourseName"].tolist()
+        self.prereq_ptr, self.prereq_ids, self._prereq_raw = self._adjacency(df["Prerequisites"].tolist())
+        self.coreq_ptr, self.coreq_ids, self._coreq_raw = self._adjacency(df["CoRequisites"].tolist())
+        self.credits = np.array([int(c) for c in df["CreditHours"].tolist()], dtype=np.int16)
+        self.level_labels, self.level_ids = _enum(df["Level"].tolist())
+        self.levels = np.array([_level_number(v) for v in self.level_labels], dtype=np.int8)[self.level_ids]
+        self.semester_labels, self.semester_ids = _enum([str(s) for s in df["SemesterOffered"].tolist()])
+        self.semester_bits = np.array([SEMESTER_BITS.get(s, 0) for s in self.semester_labels],
+                                      dtype=np.uint8)[self.semester_ids]
+        self.tracks, self.track_ids = _enum(df["Track"].tolist())
+        self.track_ids_by_name = {track: tid for tid, track in enumerate(self.tracks)}
+
+        self.prereq_codes = CourseColumn(lambda cid: self.codes_at(self.prereq_ids, self.prereq_ptr, cid), size)
+        self.coreq_codes = CourseColumn(lambda cid: self.codes_at(self.coreq_ids, self.coreq_ptr, cid), size)
+        self.prereq_raw = CourseColumn(lambda cid: self._prereq_raw.get(cid) or self.prereq_codes[cid], size)
+        self.coreq_raw = CourseColumn(lambda cid: self._coreq_raw.get(cid) or self.coreq_codes[cid], size)
+        self.prereq_masks = CourseColumn(lambda cid: self.mask_of_ids(self.prerequisites(cid)), size)
+        self.coreq_masks = CourseColumn(lambda cid: self.mask_of_ids(self.corequisites(cid)), size)
+        self.credit_values = CourseColumn(lambda cid: int(self.credits[cid]), size)
+        self.level_values = CourseColumn(lambda cid: self.level_labels[self.level_ids[cid]], size)
+        self.semester_values = CourseColumn(lambda cid: self.semester_labels[self.semester_ids[cid]], size)
+        self.track_values = CourseColumn(lambda cid: self.tracks[self.track_ids[cid]], size)
+        # One (owner, prerequisite) pair per edge, for the vectorized checks.
+        self.prereq_owner = np.repeat(np.arange(size, dtype=np.int32), np.diff(self.prereq_ptr))
+        self.prereq_target = self.prereq_ids
+        self._shards = self._build_shards()
+        self._offered = {}
+        self._graph = None
+        self._search = None
+        self._prereq_table = None
+
+    @property
+    def graph(self):
+        """The transitive prerequisite structure, computed on first use."""
+        if self._graph is None:
+            self._graph = PrerequisiteGraph(self)
+        return self._graph
+
+    @property
+    def search(self):
+        """Picker labels and the course search index, built on first use."""
+        if self._search is None:
+            self._search = CourseSearch(self)
+        return self._search
+
+    def _build_shards(self):
+        shards = {}
+        by_track = np.argsort(self.track_ids, kind="stable")
+        bounds = np.searchsorted(self.track_ids[by_track], np.arange(len(self.tracks) + 1))
+        for tid, track in enumerate(self.tracks):
+            rows = by_track[bounds[tid]:bounds[tid + 1]].astype(np.int32)
+            for semester in ("Fall", "Spring"):
+                offered = rows[(self.semester_bits[rows] & SEMESTER_BITS[semester]) != 0]
+                shards[(track, semester)] = CatalogShard(self, offered)
+        return shards
+
+    @property
+    def program_tracks(self):
+        """Tracks a student can follow (every track but the common one), in
+        alphabetical order."""
+        return sorted(track for track in self.tracks if track != COMMON_TRACK)
+
+    def shards(self, semester, track):
+        """The shards offered to ``track`` in ``semester``: its own and the
+        common one."""
+        keys = dict.fromkeys([(track, semester), (COMMON_TRACK, semester)])
+        return [self._shards[key] for key in keys if key in self._shards]
+
+    def offered_rows(self, semester, track):
+        """Catalog rows offered to ``track`` in ``semester``, ascending."""
+        shards = self.shards(semester, track)
+        if len(shards) == 1:
+            return shards[0].rows
+        return np.sort(np.concatenate([shard.rows for shard in shards] or [np.empty(0, dtype=np.int32)]))
+
+    def offered_prereqs_met(self, semester, track, passed_ids):
+        """``offered_rows()`` and, per row, whether its prerequisites are all
+        in ``passed_ids`` (see ``id_array()``)."""
+        shards = self.shards(semester, track)
+        if not shards:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=bool)
+        rows = np.concatenate([shard.rows for shard in shards])
+        met = np.concatenate([shard.prereqs_met(passed_ids) for shard in shards])
+        order = np.argsort(rows, kind="stable")
+        return rows[order], met[order]
+
+    def id_array(self, mask):
+        """The IDs in a bitset as a sorted NumPy array."""
+        return np.flatnonzero(self.to_array(mask)).astype(np.int32)
+
+    def _adjacency(self, values):
+        """CSR arrays for one requisite column, registering codes that are
+        not catalog rows. Raw entries (split on commas, unstripped) are kept
+        only for courses where they differ from the stripped codes."""
+        ptr = np.zeros(len(values) + 1, dtype=np.int32)
+        targets = []
+        raw_lists = {}
+        for cid, value in enumerate(values):
+            raw = value.split(",") if value else []
+            refs = [ref.strip() for ref in raw if ref.strip()]
+            if raw != refs:
+                raw_lists[cid] = raw
+            for code in refs:
+                target = self.ids.get(code)
+                if target is None:
+                    target = self.ids[sys.intern(code)] = len(self.codes)
+                    self.codes.append(code)
+                targets.append(target)
+            ptr[cid + 1] = len(targets)
+        return ptr, np.array(targets, dtype=np.int32), raw_lists
+
+    def prerequisites(self, cid):
+        """IDs of the prerequisites of row ``cid``, in catalog order."""
+        return self.prereq_ids[self.prereq_ptr[cid]:self.prereq_ptr[cid + 1]].tolist()
+
+    def corequisites(self, cid):
+        return self.coreq_ids[self.coreq_ptr[cid]:self.coreq_ptr[cid + 1]].tolist()
+
+    def corequisites_met(self, cid, mask):
+        """Whether every co-requisite of row ``cid`` is in the bitset ``mask``."""
+        start, end = self.coreq_ptr[cid], self.coreq_ptr[cid + 1]
+        return start == end or all(mask >> other & 1 for other in self.coreq_ids[start:end].tolist())
+
+    def codes_at(self, ids, ptr, cid):
+        return [self.codes[other] for other in ids[ptr[cid]:ptr[cid + 1]].tolist()]
+
+    @staticmethod
+    def mask_of_ids(ids):
+        mask = 0
+        for cid in ids:
+            mask |= 1 << cid
+        return mask
+
+    def row_of(self, code):
+        cid = self.ids.get(code)
+        return cid if cid is not None and cid < self.size else None
+
+    def mask_of(self, codes):
+        ids = [cid for cid in map(self.ids.get, (str(code).strip() for code in codes)) if cid is not None]
+        if len(ids) < 64:
+            return self.mask_of_ids(ids)
+        # Each |= copies the whole int; pack long lists in one go instead.
+        bits = np.zeros(len(self.codes), dtype=bool)
+        bits[ids] = True
+        return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+    @staticmethod
+    def ids_of(mask):
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+    def corequisite_bundle(self, cid, candidates, passed_mask):
+        """``cid`` plus every unpassed co-requisite it needs, transitively;
+        None if one of them cannot be taken now."""
+        members = {cid}
+        stack = [cid]
+        while stack:
+            for other in self.corequisites(stack.pop()):
+                if passed_mask >> other & 1:
+                    continue
+                if other not in candidates:
+                    return None
+                if other not in members:
+                    members.add(other)
+                    stack.append(other)
+        return frozenset(members)
+
+    def corequisite_groups(self, candidate_ids, passed_mask, max_union=6):
+        """Alternative bundles per group of co-requisite-linked candidates:
+        every union of bundles for groups of up to ``max_union`` bundles,
+        otherwise the single bundles and the whole group."""
+        candidates = set(candidate_ids)
+        parent = {cid: cid for cid in candidate_ids}
+
+        def find(cid):
+            while parent[cid] != cid:
+                parent[cid] = parent[parent[cid]]
+                cid = parent[cid]
+            return cid
+
+        bundles = {}
+        for cid in candidate_ids:
+            bundle = self.corequisite_bundle(cid, candidates, passed_mask)
+            if bundle is None:
+                continue
+            bundles[cid] = bundle
+            for member in bundle:
+                parent[find(member)] = find(cid)
+        groups = {}
+        for cid, bundle in bundles.items():
+            options = groups.setdefault(find(cid), [])
+            if bundle not in options:
+                options.append(bundle)
+        for options in groups.values():
+            if 1 < len(options) <= max_union:
+                # Any union of bundles is itself a valid choice.
+                unions = {frozenset().union(*combo) for k in range(2, len(options) + 1)
+                          for combo in itertools.combinations(options, k)}
+                options.extend(sorted(unions - set(options), key=sorted))
+            elif len(options) > 1:
+                whole = frozenset().union(*options)
+                if whole not in options:
+                    options.append(whole)
+        return list(groups.values())
+
+    def codes_of(self, mask):
+        return [self.codes[cid] for cid in self.ids_of(mask)]
+
+    def to_array(self, mask):
+        nbytes = (len(self.codes) + 7) // 8
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes(nbytes, "little"), dtype=np.uint8), bitorder="little")
+        return bits[:len(self.codes)].astype(bool)
+
+    def offered(self, semester, track):
+        """``offered_rows()`` as a boolean array over the whole catalog."""
+        key = (semester, track)
+        offered = self._offered.get(key)
+        if offered is None:
+            offered = np.zeros(self.size, dtype=bool)
+            offered[self.offered_rows(semester, track)] = True
+            offered.flags.writeable = False
+            self._offered[key] = offered
+        return offered
+
+    def offered_ids(self, semester, track):
+        return self.offered_rows(semester, track).tolist()
+
+    def prereqs_met(self, passed_mask):
+        passed = self.to_array(passed_mask)
+        missing = ~passed[self.prereq_target]
+        return np.bincount(self.prereq_owner[missing], minlength=self.size) == 0
+
+    def prereqs_met_many(self, passed_masks, rows=None):
+        """``prereqs_met()`` for several students in one pass: a boolean
+        array with one row per passed-courses bitset. With ``rows`` (e.g.
+        ``offered_rows()``) only those catalog rows are checked, and the
+        work scales with them rather than with the catalog."""
+        if self._prereq_table is None:
+            # Row per course listing its prerequisite IDs, padded with an
+            # extra always-passed column.
+            counts = np.bincount(self.prereq_owner, minlength=self.size)
+            table = np.full((self.size, int(counts.max(initial=0))), len(self.codes), dtype=np.int32)
+            slots = np.arange(self.prereq_owner.size) - np.repeat(np.cumsum(counts) - counts, counts)
+            table[self.prereq_owner, slots] = self.prereq_target
+            self._prereq_table = table
+        if rows is not None:
+            # Only the courses these rows refer to become columns.
+            table = self._prereq_table[rows]
+            columns, inverse = np.unique(table, return_inverse=True)
+            table = inverse.reshape(table.shape)
+            passed = np.array([np.isin(columns, np.append(self.id_array(mask), len(self.codes))) for mask in passed_masks],
+                              dtype=bool).reshape(len(passed_masks), len(columns))
+            return passed[:, table].all(axis=2)
+        nbytes = (len(self.codes) + 7) // 8
+        packed = np.frombuffer(b"".join(mask.to_bytes(nbytes, "little") for mask in passed_masks), dtype=np.uint8)
+        passed = np.ones((len(passed_masks), len(self.codes) + 1), dtype=bool)
+        passed[:, :-1] = np.unpackbits(packed.reshape(len(passed_masks), nbytes), axis=1,
+                                       count=len(self.codes), bitorder="little").view(bool)
+        return passed[:, self._prereq_table].all(axis=2)
+
+    def eligible(self, passed_mask, student_level, semester=None, track=None, prereqs_met=None):
+        """Boolean array over catalog rows: prerequisites met, level allowed
+        and, when ``semester`` is given, offered for that semester/track.
+        ``prereqs_met`` may carry a row precomputed by ``prereqs_met_many()``."""
+        if prereqs_met is None:
+            prereqs_met = self.prereqs_met(passed_mask)
+        eligible = prereqs_met & (self.levels <= int(student_level))
+        if semester is not None:
+            eligible &= self.offered(semester, track)
+        return eligible
+
+# PrerequisiteGraph Class
+def strongly_connected_components(successors):
+    """Strongly connected components (iterative Tarjan) of the directed graph
+    ``{node: [successor, ...]}``, as lists of nodes. Successors that are not
+    keys of ``successors`` are ignored."""
+    number, low, on_stack, stack, components = {}, {}, set(), [], []
+    counter = itertools.count()
+    for root in successors:
+        if root in number:
+            continue
+        number[root] = low[root] = next(counter)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors[root]))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in successors:
+                    continue
+                if child not in number:
+                    number[child] = low[child] = next(counter)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], number[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == number[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+class PrerequisiteGraph:
+    """Transitive prerequisite structure of one catalog version.
+
+    For every course ID this holds the bitset of all courses it requires,
+    directly or not (``requires``), and of all courses it eventually unlocks
+    (``unlocks``). It also holds the longest prerequisite chain before the
+    course (``depth``) and the longest chain that starts at it, counting the
+    course itself (``height``). These queries are therefore lookups. Courses
+    on a prerequisite cycle (``cyclic``), and those that require one
+    (``blocked``), can never be recommended; their depth and height are -1.
+    The bitsets take O(n^2) bits in the worst case, so this is built on
+    first use through ``CatalogIndex.graph``.
+    """
+    def __init__(self, index):
+        started = time.perf_counter()
+        self.index = index
+        n = len(index.codes)
+        prereq_ids = [[] for _ in range(n)]
+        required_by = [[] for _ in range(n)]
+        for owner, target in zip(index.prereq_owner.tolist(), index.prereq_target.tolist()):
+            if target not in prereq_ids[owner]:
+                prereq_ids[owner].append(target)
+                required_by[target].append(owner)
+
+        # Kahn's algorithm: a course is ordered once all its prerequisites are.
+        pending = [len(p) for p in prereq_ids]
+        order = [cid for cid in range(n) if not pending[cid]]
+        requires = [0] * n
+        depth = [0] * n
+        i = 0
+        while i < len(order):
+            cid = order[i]
+            i += 1
+            inherited = requires[cid] | (1 << cid)
+            for owner in required_by[cid]:
+                requires[owner] |= inherited
+                depth[owner] = max(depth[owner], depth[cid] + 1)
+                pending[owner] -= 1
+                if not pending[owner]:
+                    order.append(owner)
+
+        # Whatever Kahn's algorithm could not order is on a cycle or requires one.
+        blocked = [cid for cid in range(n) if pending[cid]]
+        unlocks = [0] * n
+        height = [1] * n
+        if blocked:
+            self._fixed_point(blocked, prereq_ids, requires)
+            self._fixed_point(blocked, required_by, unlocks)
+            for cid in blocked:
+                depth[cid] = height[cid] = -1
+                for p in prereq_ids[cid]:
+                    if not pending[p]:
+                        unlocks[p] |= unlocks[cid] | (1 << cid)
+        for cid in reversed(order):
+            inherited = unlocks[cid] | (1 << cid)
+            for p in prereq_ids[cid]:
+                unlocks[p] |= inherited
+                height[p] = max(height[p], height[cid] + 1)
+
+        self.order = order
+        self.requires = requires
+        self.unlocks = unlocks
+        self.depth = np.array(depth, dtype=np.int32)
+        self.height = np.array(height, dtype=np.int32)
+        self.cyclic = [cid for cid in blocked if requires[cid] >> cid & 1]
+        self.blocked = [cid for cid in blocked if not requires[cid] >> cid & 1]
+        catalog_heights = self.height[:index.size]
+        self.critical_path_length = int(catalog_heights.max()) if index.size else 0
+        if self.cyclic:
+            logger.warning(f"Prerequisite cycle among {index.codes_of(sum(1 << c for c in self.cyclic))}; "
+                           f"{len(self.blocked)} more courses depend on it")
+        logger.info(f"Computed prerequisite closure for {n} courses in {time.perf_counter() - started:.4f}s")
+
+    @staticmethod
+    def _fixed_point(ids, edges, closure):
+        changed = True
+        while changed:
+            changed = False
+            for cid in ids:
+                value = closure[cid]
+                for other in edges[cid]:
+                    value |= closure[other] | (1 << other)
+                if value != closure[cid]:
+                    closure[cid] = value
+                    changed = True
+
+    def _id(self, code):
+        cid = self.index.ids.get(code)
+        if cid is None:
+            raise KeyError(code)
+        return cid
+
+    def requirements_of(self, code):
+        """Every course ``code`` requires, directly or transitively."""
+        return self.index.codes_of(self.requires[self._id(code)])
+
+    def unlocked_by(self, code):
+        """Every course that ``code`` eventually unlocks."""
+        return self.index.codes_of(self.unlocks[self._id(code)])
+
+    def chain_length(self, code):
+        """Courses on the longest prerequisite chain starting at ``code``
+        (inclusive); -1 if it can never be taken."""
+        return int(self.height[self._id(code)])
+
+    def remaining_chain(self, passed_mask):
+        """Semesters needed at least to finish the catalog: the longest chain
+        among courses not yet passed."""
+        remaining = ~self.index.to_array(passed_mask)[:self.index.size]
+        heights = self.height[:self.index.size][remaining]
+        return int(heights.max()) if heights.size else 0
+
+class CourseSearch:
+    """Course picker options of one catalog version, with a search index.
+
+    ``labels`` are the "CODE - Level N" picker strings in catalog order and
+    ``code_of`` maps them back to course codes. Each course's code and name
+    are indexed by trigram (sorted arrays of course IDs) for substring
+    queries, and by word for prefix queries on terms shorter than three
+    characters. A query with no exact matches falls back to the courses
+    sharing most of its trigrams, so small typos still find the course.
+    """
+    def __init__(self, index):
+        self.index = index
+        size = index.size
+        self.labels = [f"{code} - Level {level}" for code, level in zip(index.codes, index.level_values)]
+        self.code_of = dict(zip(self.labels, index.codes))
+        self.texts = [f"{code} {name}".lower() for code, name in zip(index.codes, index.names)]
+        self.lower_codes = np.array([code.lower() for code in index.codes[:size]], dtype=str)
+        # Position in (level, code) order, so sorting by it groups courses by level.
+        self.position = np.empty(size, dtype=np.int32)
+        self.position[np.lexsort((self.lower_codes, index.levels))] = np.arange(size, dtype=np.int32)
+        postings = collections.defaultdict(list)
+        words = []
+        for cid, text in enumerate(self.texts):
+            for gram in set(self._trigrams(text)):
+                postings[gram].append(cid)
+            words.extend((word, cid) for word in set(text.split()))
+        self.trigrams = {gram: np.array(cids, dtype=np.int32) for gram, cids in postings.items()}
+        words.sort()
+        self.words = [word for word, _ in words]
+        self.word_ids = np.array([cid for _, cid in words], dtype=np.int32)
+
+    @staticmethod
+    def _trigrams(text):
+        return [text[i:i + 3] for i in range(len(text) - 2)]
+
+    def _prefixed(self, term):
+        start = bisect.bisect_left(self.words, term)
+        end = bisect.bisect_left(self.words, term + "\uffff")
+        return np.unique(self.word_ids[start:end])
+
+    def _containing(self, term):
+        lists = sorted((self.trigrams.get(gram, np.empty(0, dtype=np.int32)) for gram in set(self._trigrams(term))),
+                       key=len)
+        found = lists[0]
+        for cids in lists[1:]:
+            if not found.size:
+                break
+            found = np.intersect1d(found, cids, assume_unique=True)
+        # Trigrams can match out of order; confirm the substring.
+        return found[[term in self.texts[cid] for cid in found.tolist()]] if found.size else found
+
+    def _fuzzy(self, terms):
+        lists = [self.trigrams[gram] for term in terms for gram in self._trigrams(term) if gram in self.trigrams]
+        grams = sum(max(len(term) - 2, 0) for term in terms)
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        hits = np.bincount(np.concatenate(lists), minlength=self.index.size)
+        found = np.flatnonzero(hits >= max(1, (grams + 1) // 2))
+        return found, grams - hits[found]
+
+    def matches(self, query, exclude=0):
+        """IDs of the courses matching ``query`` (all courses for a blank
+        query) that are not in the ``exclude`` bitset, grouped by level;
+        within a level, courses whose code starts with the query come first."""
+        terms = query.lower().split()
+        found = None
+        for term in terms:
+            cids = self._containing(term) if len(term) >= 3 else self._prefixed(term)
+            found = cids if found is None else np.intersect1d(found, cids, assume_unique=True)
+        if found is None:
+            found = np.arange(self.index.size)
+        missing = np.zeros(len(found), dtype=np.int64)
+        if not found.size and terms:
+            found, missing = self._fuzzy(terms)
+        if exclude:
+            keep = ~self.index.to_array(exclude)[found]
+            found, missing = found[keep], missing[keep]
+        code_first = ~np.char.startswith(self.lower_codes[found], query.strip().lower()) if terms else missing
+        order = np.lexsort((self.position[found], missing, code_first, self.index.levels[found]))
+        return found[order].tolist()
+
+class CatalogIndexRegistry:
+    """Process-wide map from a catalog DataFrame to its compiled index."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.builds = 0
+
+    def get(self, df):
+        key = id(df)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is df:
+                return entry[1]
+            started = time.perf_counter()
+            index = CatalogIndex(df)
+            self._entries[key] = (weakref.ref(df), index)
+            weakref.finalize(df, self._entries.pop, key, None)
+            self.builds += 1
+        logger.info(f"Compiled catalog index for {index.size} courses in {time.perf_counter() - started:.4f}s (builds={self.builds})")
+        return index
+
+@st.cache_resource
+def get_index_registry():
+    return CatalogIndexRegistry()
+
+def get_catalog_index(df):
+    return get_index_registry().get(df)
+
+# Bulk import
+LEVELS = ("1", "2", "3", "4")
+IMPORT_REPORT_COLUMNS = ["Row", "CourseCode", "Error"]
+
+def _cell_text(value):
+    if isinstance(value, (list, tuple)):
+        return ",".join(_cell_text(v) for v in value)
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def read_course_records(source, name=None):
+    """Courses from a CSV or JSON file (a path or an uploaded file) as a
+    frame of stripped strings in the catalog's columns. JSON holds a list of
+    course objects, or an object with a ``courses`` list. Values are not
+    checked here; see ``validate_course_rows()``."""
+    name = name or getattr(source, "name", None) or str(source)
+    if name.lower().endswith(".json"):
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, encoding="utf-8") as f:
+                records = json.load(f)
+        else:
+            records = json.load(source)
+        if isinstance(records, dict):
+            records = records.get("courses")
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise ValueError("Expected a JSON list of courses (or an object with a 'courses' list)")
+        df = pd.DataFrame(records)
+    else:
+        df = pd.read_csv(source, dtype=str, keep_default_na=False)
+    df = df.rename(columns=KnowledgeBase.column_aliases)
+    missing = [col for col in KnowledgeBase.required_columns
+               if col not in df.columns and col not in ("Prerequisites", "CoRequisites")]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    for col in ("Prerequisites", "CoRequisites"):
+        if col not in df.columns:
+            df[col] = ""
+    df = df[KnowledgeBase.required_columns].reset_index(drop=True)
+    if df.empty:
+        return df.astype(str)
+    return df.map(_cell_text)
+
+def validate_course_rows(rows, existing_codes=()):
+    """Check every row of ``read_course_records()`` in one pass: required
+    fields, duplicate codes (within the file and against
+    ``existing_codes``), credit hours, semester and level values, unknown or
+    self references and prerequisite cycles. Returns the normalized courses
+    and a report with one line per error (``Row`` counts the records from
+    1); the courses are only meant to be saved when the report is empty."""
+    n = len(rows)
+    codes = rows["CourseCode"]
+    existing = pd.Index(existing_codes, dtype=object)
+    found = []
+
+    def flag(mask, message):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            found.append(pd.DataFrame({"Row": np.flatnonzero(mask) + 1, "CourseCode": codes[mask].to_numpy(),
+                                       "Error": message[mask].to_numpy() if isinstance(message, pd.Series)
+                                       else message}))
+
+    flag(codes == "", "Course Code cannot be empty!")
+    flag(rows["CourseName"] == "", "Course Name cannot be empty!")
+    first_row = pd.Series(np.arange(1, n + 1), index=codes)[~codes.duplicated().to_numpy()]
+    duplicate = codes.duplicated() & (codes != "")
+    flag(duplicate, "Duplicate course code (first given in row " + codes.map(first_row).astype(str) + ")")
+    flag(codes.isin(existing) & ~duplicate, "Course Code already exists!")
+    credits = pd.to_numeric(rows["CreditHours"], errors="coerce")
+    flag(credits.isna() | (credits <= 0) | (credits % 1 != 0), "Credit Hours must be a positive integer!")
+    semesters = rows["SemesterOffered"].str.title()
+    flag(~semesters.isin(["Fall", "Spring", "Both"]), "Semester Offered must be Fall, Spring or Both")
+    flag(~rows["Level"].isin(LEVELS), f"Level must be one of {', '.join(LEVELS)}")
+    flag(rows["Track"] == "", "Track cannot be empty!")
+
+    # One (row, referenced code) pair per requisite; references may point at
+    # the existing catalog or at any course of the file.
+    new_codes = pd.Index(codes[(codes != "") & ~duplicate])
+    known = existing.append(new_codes)
+    for col, label in (("Prerequisites", "prerequisite"), ("CoRequisites", "co-requisite")):
+        refs = rows[col].str.split(",").explode().str.strip()
+        refs = refs[refs.notna() & (refs != "")]
+        self_ref = (refs.to_numpy() == codes.to_numpy()[refs.index]) & (refs.to_numpy() != "")
+        flag(np.isin(np.arange(n), refs.index[self_ref]), "Course cannot be a prerequisite or corequisite of itself!")
+        unknown = refs[~refs.isin(known)].groupby(level=0).agg(", ".join)
+        message = pd.Series("", index=rows.index)
+        message[unknown.index] = f"Unknown {label}: " + unknown
+        flag(message != "", message)
+        if col == "Prerequisites":
+            # Existing courses cannot require the new ones, so any new cycle
+            # runs through new courses only: report the strongly connected
+            # components of more than one new course. Self-references are
+            # already reported above.
+            keep = ~duplicate.to_numpy()[refs.index]
+            owners = codes.to_numpy()[refs.index[keep]]
+            targets = refs.to_numpy()[keep]
+            inside = new_codes.get_indexer(owners) >= 0
+            inside &= (new_codes.get_indexer(targets) >= 0) & (owners != targets)
+            requires = collections.defaultdict(list)
+            for owner, target in zip(owners[inside].tolist(), targets[inside].tolist()):
+                requires[owner].append(target)
+            partners = {}
+            for component in strongly_connected_components(requires):
+                if len(component) > 1:
+                    members = set(component)
+                    for code in component:
+                        partners[code] = ", ".join(t for t in dict.fromkeys(requires[code]) if t in members)
+            if partners:
+                message = "Prerequisite cycle through " + codes.map(partners)
+                flag(message.notna() & ~duplicate, message)
+
+    report = (pd.concat(found, ignore_index=True).sort_values("Row", kind="stable", ignore_index=True)
+              if found else pd.DataFrame(columns=IMPORT_REPORT_COLUMNS))
+    courses = rows.copy()
+    courses["SemesterOffered"] = semesters
+    courses["CreditHours"] = credits.fillna(0).astype(int)
+    courses["Level"] = pd.to_numeric(rows["Level"], errors="coerce").fillna(0).astype(int)
+    return courses, report
 
 # KnowledgeBase Class
 class KnowledgeBase:
-    def __init__(self):
+    required_columns = ["CourseCode", "CourseName", "Prerequisites",
+                        "CoRequisites", "CreditHours", "SemesterOffered",
+                        "Track", "Level"]
+    column_aliases = {
+        "Course Code": "CourseCode",
+        "Course Name": "CourseName",
+        "Credit Hours": "CreditHours",
+        "Semester Offered": "SemesterOffered",
+        "Co-requisites": "CoRequisites"
+    }
+
+    def __init__(self, csv_file="courses.csv", store=None):
+        self.csv_file = csv_file
+        self.store = store if store is not None else make_catalog_store(csv_file)
+        self.version = None
+        self.snapshot = None
+        self.stamp = None
         self.df = self.load()
 
     def load(self):
-        csv_file = "courses.csv"
-        required_columns = ["CourseCode", "CourseName", "Prerequisites", 
-                           "CoRequisites", "CreditHours", "SemesterOffered", 
-                           "Track", "Level"]
-        
-        if not os.path.exists(csv_file):
-            st.error(f"File '{csv_file}' not found. Please create it with the required columns.")
-            logger.error(f"CSV file {csv_file} not found")
-            return pd.DataFrame(columns=required_columns)
-
+        store = self.store
         try:
-            df = pd.read_csv(csv_file)
-            df = df.rename(columns={
-                "Course Code": "CourseCode",
-                "Course Name": "CourseName",
-                "Credit Hours": "CreditHours",
-                "Semester Offered": "SemesterOffered",
-                "Co-requisites": "CoRequisites"
-            })
-            for col in required_columns:
-                if col not in df.columns:
-                    df[col] = "" if col in ["Prerequisites", "CoRequisites"] else \
-                              0 if col == "CreditHours" else \
-                              "Unknown" if col == "Level" else \
-                              "Unknown"
-            df = df.dropna(subset=["CourseCode"])
-            df["CourseCode"] = df["CourseCode"].astype(str)
-            df = df.replace('nan', '')
-            df["Prerequisites"] = df["Prerequisites"].fillna("")
-            df["CoRequisites"] = df["CoRequisites"].fillna("")
-            df["SemesterOffered"] = df["SemesterOffered"].fillna("Both").astype(str).str.strip().str.title()
-            df["SemesterOffered"] = df["SemesterOffered"].replace(
-                {"": "Both", "Unknown": "Both", "None": "Both", "Nan": "Both"}
-            )
-            valid_semesters = ["Fall", "Spring", "Both"]
-            df["SemesterOffered"] = df["SemesterOffered"].apply(
-                lambda x: x if x in valid_semesters else "Both"
-            )
-            df["CreditHours"] = pd.to_numeric(df["CreditHours"], errors="coerce").fillna(3).astype(int)
-            df["Track"] = df["Track"].fillna("Big Data Analytics")
-            df["Level"] = df["Level"].fillna("Unknown")
-            df = df.drop_duplicates(subset=["CourseCode"], keep="first")
-            logger.info(f"Loaded {len(df)} courses from {csv_file} after removing duplicates")
-            return df[required_columns]
+            if not store.exists():
+                st.error(f"File '{store.label}' not found. Please create it with the required columns.")
+                logger.error(f"Catalog {store.label} not found")
+                return pd.DataFrame(columns=self.required_columns)
+            # Taken before reading, so an edit made in between only makes the
+            # stamp look older than the frame and the next edit reloads.
+            stamp = store.stamp()
+            snapshot = get_catalog_cache().get(store)
         except Exception as e:
-            st.error(f"Error reading file {csv_file}: {str(e)}")
-            logger.error(f"Error reading CSV {csv_file}: {str(e)}")
-            return pd.DataFrame(columns=required_columns)
+            st.error(f"Error reading file {store.label}: {str(e)}")
+            logger.error(f"Error reading catalog {store.label}: {str(e)}")
+            return pd.DataFrame(columns=self.required_columns)
+        self.snapshot = snapshot
+        self.version = snapshot.version
+        self.stamp = stamp
+        return snapshot.df
+
+    @classmethod
+    def _read_csv(cls, csv_file):
+        required_columns = cls.required_columns
+        df = pd.read_csv(csv_file)
+        df = df.rename(columns=cls.column_aliases)
+        for col in required_columns:
+            if col not in df.columns:
+                df[col] = "" if col in ["Prerequisites", "CoRequisites"] else \
+                          0 if col == "CreditHours" else \
+                          "Unknown" if col == "Level" else \
+                          COMMON_TRACK if col == "Track" else \
+                          "Unknown"
+        df = df.dropna(subset=["CourseCode"])
+        df["CourseCode"] = df["CourseCode"].astype(str)
+        df = df.replace('nan', '')
+        df["Prerequisites"] = df["Prerequisites"].fillna("")
+        df["CoRequisites"] = df["CoRequisites"].fillna("")
+        df["SemesterOffered"] = df["SemesterOffered"].fillna("Both").astype(str).str.strip().str.title()
+        df["SemesterOffered"] = df["SemesterOffered"].replace(
+            {"": "Both", "Unknown": "Both", "None": "Both", "Nan": "Both"}
+        )
+        valid_semesters = ["Fall", "Spring", "Both"]
+        df["SemesterOffered"] = df["SemesterOffered"].apply(
+            lambda x: x if x in valid_semesters else "Both"
+        )
+        df["CreditHours"] = pd.to_numeric(df["CreditHours"], errors="coerce").fillna(3).astype(int)
+        # A course without a track is offered to every track.
+        df["Track"] = df["Track"].fillna(COMMON_TRACK).astype(str).str.strip().replace("", COMMON_TRACK)
+        df["Level"] = df["Level"].fillna("Unknown")
+        df = df.drop_duplicates(subset=["CourseCode"], keep="first")
+        logger.info(f"Loaded {len(df)} courses from {csv_file} after removing duplicates")
+        return df[required_columns]
 
     def save_to_csv(self, file_name):
+        if isinstance(self.store, CsvCatalogStore) and file_name == self.store.csv_file:
+            return self.save()
         try:
-            self.df.to_csv(file_name, index=False)
-            if os.path.exists(file_name):
-                mod_time = os.path.getmtime(file_name)
-                current_time = time.time()
-                if current_time - mod_time < 5:
-                    st.success(f"Data successfully saved to '{file_name}'!")
-                    logger.info(f"Saved data to {file_name}")
-                    return True
-                else:
-                    st.error(f"File '{file_name}' was not updated. It might be open or locked.")
-                    logger.error(f"File {file_name} not updated")
-                    return False
-            else:
-                st.error(f"File '{file_name}' was not created. Check disk space or folder permissions.")
-                logger.error(f"File {file_name} not created")
-                return False
+            _write_atomic(file_name, lambda f: self.df.to_csv(f, index=False))
+            st.success(f"Data successfully saved to '{file_name}'!")
+            logger.info(f"Saved data to {file_name}")
+            return True
         except PermissionError as e:
             st.error(f"Cannot save to '{file_name}' due to permission issues: {str(e)}")
             logger.error(f"Permission error saving {file_name}: {str(e)}")
@@ -323,8 +1705,103 @@ class KnowledgeBase:
             logger.error(f"Error saving {file_name}: {str(e)}")
             return False
 
+    def write_catalog(self):
+        """Write the whole of ``self.df`` to the store and publish it; raises
+        on failure. Shows nothing, so it also serves the command line."""
+        store = self.store
+        with store.lock:
+            store.write_all(self.df)
+            self.snapshot = get_catalog_cache().put(store, self.df)
+            self.version = self.snapshot.version
+            self.stamp = store.stamp()
+        get_result_cache().invalidate(store.key)
+        logger.info(f"Saved data to {store.label}")
+
     def save(self):
-        return self.save_to_csv("courses.csv")
+        """Write the whole of ``self.df`` to the store (see ``write_catalog()``)
+        and report the outcome on the page."""
+        store = self.store
+        try:
+            self.write_catalog()
+            st.success(f"Data successfully saved to '{store.label}'!")
+            return True
+        except PermissionError as e:
+            st.error(f"Cannot save to '{store.label}' due to permission issues: {str(e)}")
+            logger.error(f"Permission error saving {store.label}: {str(e)}")
+            return False
+        except Exception as e:
+            st.error(f"Failed to save data to '{store.label}': {str(e)}")
+            logger.error(f"Error saving {store.label}: {str(e)}")
+            return False
+
+    def record_change(self, op, course_code, course_data=None):
+        """Persist one edit of ``self.df`` and publish the new frame.
+
+        If the store changed since ``self.df`` was loaded (another session or
+        process edited it), the edit is still recorded, but the catalog is
+        then re-read from the store instead of publishing the stale frame."""
+        store = self.store
+        try:
+            with store.lock:
+                dependencies = self.dependencies
+                stamp = store.record(op, course_code, course_data, self.stamp)
+                if stamp is not None:
+                    dependencies.apply(op, course_code, course_data)
+                    self.snapshot = get_catalog_cache().put(store, self.df, dependencies, stamp)
+                    self.version = self.snapshot.version
+                    self.stamp = stamp
+                else:
+                    logger.info(f"{store.label} changed since it was loaded; reloading after the {op} of {course_code}")
+                    get_catalog_cache().bump(store.key)
+                    self.df = self.load()
+            get_result_cache().invalidate(store.key)
+            st.success(f"Data successfully saved to '{store.label}'!")
+            logger.info(f"Recorded {op} of {course_code} in {store.label}")
+            return True
+        except PermissionError as e:
+            st.error(f"Cannot save to '{store.label}' due to permission issues: {str(e)}")
+            logger.error(f"Permission error saving {store.label}: {str(e)}")
+            return False
+        except Exception as e:
+            st.error(f"Failed to save data to '{store.label}': {str(e)}")
+            logger.error(f"Error saving {store.label}: {str(e)}")
+            return False
+
+    @property
+    def index(self):
+        return get_catalog_index(self.df)
+
+    @property
+    def dependencies(self):
+        if self.snapshot is None:
+            self.snapshot = CatalogSnapshot(self.df, None)
+        return self.snapshot.dependencies
+
+    def dependents(self, course_code):
+        return self.dependencies.dependents(course_code)
+
+    def row_of(self, course_code):
+        """Row position of a course in ``self.df``, or None (hash lookup)."""
+        return self.index.row_of(course_code)
+
+    def has_course(self, course_code):
+        return self.row_of(course_code) is not None
+
+    def get_course(self, course_code):
+        row = self.row_of(course_code)
+        return None if row is None else self.df.iloc[row]
+
+    def track_selectbox(self, current=None):
+        """Track picker for a course: the common track, then the program
+        tracks of the catalog; admins may type a new one."""
+        tracks = [COMMON_TRACK] + self.index.program_tracks
+        if current is not None and current not in tracks:
+            tracks.append(current)
+        position = tracks.index(current) if current is not None else 0
+        try:
+            return st.selectbox("Track", tracks, index=position, accept_new_options=True)
+        except TypeError:
+            return st.selectbox("Track", tracks, index=position)
 
     def validate_course(self, course_data):
         try:
@@ -338,12 +1815,17 @@ class KnowledgeBase:
             coreqs = course_data["CoRequisites"].split(",") if course_data["CoRequisites"] else []
             if course_data["CourseCode"] in prereqs or course_data["CourseCode"] in coreqs:
                 raise ValueError("Course cannot be a prerequisite or corequisite of itself!")
-            valid_codes = self.df["CourseCode"].tolist()
+            dependencies = self.dependencies
             for prereq in prereqs:
-                if prereq.strip() and prereq.strip() not in valid_codes:
+                if prereq.strip() and prereq.strip() not in dependencies:
                     raise ValueError(f"Invalid prerequisite: {prereq}")
+            for prereq in prereqs:
+                path = dependencies.prerequisite_path(prereq.strip(), course_data["CourseCode"]) if prereq.strip() else None
+                if path:
+                    cycle = " → ".join([course_data["CourseCode"]] + path)
+                    raise ValueError(f"Prerequisite cycle: {cycle} (each course requires the next)")
             for coreq in coreqs:
-                if coreq.strip() and coreq.strip() not in valid_codes:
+                if coreq.strip() and coreq.strip() not in dependencies:
                     raise ValueError(f"Invalid co-requisite: {coreq}")
         except Exception as e:
             logger.error(f"Error validating course data: {str(e)}")
@@ -351,15 +1833,15 @@ class KnowledgeBase:
 
     def add_course(self, course_data):
         try:
-            if course_data["CourseCode"] in self.df["CourseCode"].values:
+            if self.has_course(course_data["CourseCode"]):
                 raise ValueError("Course Code already exists!")
             self.validate_course(course_data)
             self.df = pd.concat([self.df, pd.DataFrame([course_data])], ignore_index=True)
-            if self.save():
+            if self.record_change("add", course_data["CourseCode"], course_data):
                 st.success(f"Course '{course_data['CourseCode']}' added successfully!")
                 logger.info(f"Added course {course_data['CourseCode']}")
             else:
-                raise ValueError("Failed to save the new course to the CSV file.")
+                raise ValueError("Failed to save the new course to the catalog.")
         except Exception as e:
             st.error(f"Error adding course: {str(e)}")
             logger.error(f"Error adding course: {str(e)}")
@@ -367,35 +1849,63 @@ class KnowledgeBase:
 
     def edit_course(self, course_code, course_data):
         try:
-            if course_code not in self.df["CourseCode"].values:
+            row = self.row_of(course_code)
+            if row is None:
                 raise ValueError("Course Code does not exist!")
             self.validate_course(course_data)
-            self.df.loc[self.df["CourseCode"] == course_code, ["CourseName", "Prerequisites", 
-                "CoRequisites", "CreditHours", "SemesterOffered", "Track", "Level"]] = \
-                [course_data["CourseName"], course_data["Prerequisites"], 
-                 course_data["CoRequisites"], course_data["CreditHours"], course_data["SemesterOffered"], 
-                 course_data["Track"], course_data["Level"]]
-            if self.save():
+            changes = {col: course_data[col] for col in ["CourseName", "Prerequisites", "CoRequisites",
+                                                         "CreditHours", "SemesterOffered", "Track", "Level"]}
+            # The loaded frame is the shared catalog snapshot; never write into it.
+            self.df = self.df.copy()
+            for col, value in changes.items():
+                self.df.iat[row, self.df.columns.get_loc(col)] = value
+            if self.record_change("edit", course_code, changes):
                 st.success(f"Course '{course_code}' updated successfully!")
                 logger.info(f"Updated course {course_code}")
             else:
-                raise ValueError("Failed to save the updated course to the CSV file.")
+                raise ValueError("Failed to save the updated course to the catalog.")
         except Exception as e:
             st.error(f"Error editing course: {str(e)}")
             logger.error(f"Error editing course: {str(e)}")
             raise
 
+    def import_courses(self, source, replace=False, dry_run=False, name=None):
+        """Add the courses of a CSV/JSON file (or replace the catalog with
+        them) after validating all rows together; see
+        ``validate_course_rows()``. Nothing is saved unless every row is
+        valid, and then the new catalog is written once. Returns the
+        normalized courses and the error report. Shows nothing on the page;
+        the caller reports the outcome."""
+        rows = read_course_records(source, name)
+        store = self.store
+        with contextlib.nullcontext() if dry_run else store.lock:
+            if not dry_run and store.exists() and store.stamp() != self.stamp:
+                # Another session or process edited the catalog since it was loaded.
+                self.df = self.load()
+            existing = () if replace else self.df["CourseCode"].tolist()
+            courses, report = validate_course_rows(rows, existing)
+            logger.info(f"Validated {len(rows)} imported courses: {len(report)} errors")
+            if report.empty and not dry_run:
+                previous = self.df
+                self.df = courses if replace else pd.concat([self.df, courses], ignore_index=True)
+                try:
+                    self.write_catalog()
+                except Exception as e:
+                    self.df = previous
+                    logger.error(f"Error saving imported courses to {store.label}: {str(e)}")
+                    raise ValueError(f"Failed to save the imported courses to '{store.label}': {str(e)}") from e
+                logger.info(f"Imported {len(courses)} courses into {store.label} (replace={replace})")
+        return courses, report
+
     def delete_course(self, course_code):
         try:
-            if course_code not in self.df["CourseCode"].values:
+            row = self.row_of(course_code)
+            if row is None:
                 raise ValueError("Course Code does not exist!")
-            for _, row in self.df.iterrows():
-                prereqs = row["Prerequisites"].split(",") if row["Prerequisites"] else []
-                coreqs = row["CoRequisites"].split(",") if row["CoRequisites"] else []
-                if course_code in prereqs or course_code in coreqs:
-                    raise ValueError(f"Cannot delete {course_code} as it is a prerequisite or corequisite for another course!")
-            self.df = self.df[self.df["CourseCode"] != course_code].reset_index(drop=True)
-            if self.save():
+            if self.dependents(course_code):
+                raise ValueError(f"Cannot delete {course_code} as it is a prerequisite or corequisite for another course!")
+            self.df = self.df.drop(index=self.df.index[row]).reset_index(drop=True)
+            if self.record_change("delete", course_code):
                 st.success(f"Course '{course_code}' deleted successfully!")
                 logger.info(f"Deleted course {course_code}")
             else:
@@ -405,11 +1915,31 @@ class KnowledgeBase:
             logger.error(f"Error deleting course: {str(e)}")
             raise
 
+    def show_dependents(self, course_code):
+        dependents = self.dependents(course_code)
+        if not dependents:
+            st.caption(f"No course depends on {course_code}.")
+        else:
+            kinds = {"pre": "prerequisite", "co": "co-requisite"}
+            st.info(f"{course_code} is required by: " +
+                    ", ".join(f"{code} ({kinds[kind]})" for code, kind in dependents))
+        graph = self.index.graph
+        if self.has_course(course_code):
+            unlocked = graph.unlocked_by(course_code)
+            st.caption(f"Eventually unlocks {len(unlocked)} courses; the longest prerequisite chain "
+                       f"starting here is {graph.chain_length(course_code)} courses.")
+
     def editor(self):
         st.subheader("Knowledge Base Editor")
-        st.markdown("Use this section to manage the course catalog for the Big Data Analytics track.")
+        st.markdown("Use this section to manage the course catalog of every track.")
         if self.df.empty:
             st.warning("No courses available. Please add a new course.")
+        else:
+            graph = self.index.graph
+            if graph.cyclic:
+                st.warning(f"Prerequisite cycle: {', '.join(self.index.codes_of(sum(1 << c for c in graph.cyclic)))} "
+                           f"can never be recommended"
+                           + (f", nor can {len(graph.blocked)} courses that require them." if graph.blocked else "."))
 
         if "admin_action" not in st.session_state:
             st.session_state.admin_action = None
@@ -419,6 +1949,7 @@ class KnowledgeBase:
             st.markdown('<div class="admin-button-container">', unsafe_allow_html=True)
             col1, col2 = st.columns(2)
             col3, col4 = st.columns(2)
+            col5, _ = st.columns(2)
 
             with col1:
                 if st.button("📊 View Courses", use_container_width=True):
@@ -436,6 +1967,10 @@ class KnowledgeBase:
                 if st.button("🗑️ Delete Course", use_container_width=True):
                     st.session_state.admin_action = "Delete Course"
                     st.rerun()
+            with col5:
+                if st.button("📥 Bulk Import", use_container_width=True):
+                    st.session_state.admin_action = "Bulk Import"
+                    st.rerun()
             st.markdown('</div>', unsafe_allow_html=True)
 
         else:
@@ -473,7 +2008,7 @@ class KnowledgeBase:
                     corequisites = ",".join(selected_coreqs) if selected_coreqs else ""
                     credit_hours = st.number_input("Credit Hours", min_value=1, step=1)
                     semester_offered = st.selectbox("Semester Offered", ["Fall", "Spring", "Both"])
-                    track = st.selectbox("Track", ["All", "Big Data Analytics"])
+                    track = self.track_selectbox()
                     level = st.selectbox("Level", ["1", "2", "3", "4"])
                     col1, col2 = st.columns(2)
                     with col1:
@@ -508,7 +2043,8 @@ class KnowledgeBase:
             elif st.session_state.admin_action == "Edit Course":
                 st.markdown("### Edit Course")
                 course_code = st.selectbox("Select Course to Edit", self.df["CourseCode"])
-                course_data = self.df[self.df["CourseCode"] == course_code].iloc[0]
+                course_data = self.get_course(course_code)
+                self.show_dependents(course_code)
 
                 with st.form("edit_course_form"):
                     course_name = st.text_input("Course Name", value=course_data["CourseName"])
@@ -522,8 +2058,7 @@ class KnowledgeBase:
                     credit_hours = st.number_input("Credit Hours", min_value=1, step=1, value=int(course_data["CreditHours"]))
                     semester_offered = st.selectbox("Semester Offered", ["Fall", "Spring", "Both"], 
                                                     index=["Fall", "Spring", "Both"].index(course_data["SemesterOffered"]))
-                    track = st.selectbox("Track", ["All", "Big Data Analytics"], 
-                                         index=["All", "Big Data Analytics"].index(course_data["Track"]))
+                    track = self.track_selectbox(course_data["Track"])
                     level = st.selectbox("Level", ["1", "2", "3", "4"], 
                                          index=["1", "2", "3", "4"].index(str(course_data["Level"])))
                     col1, col2 = st.columns(2)
@@ -559,6 +2094,7 @@ class KnowledgeBase:
             elif st.session_state.admin_action == "Delete Course":
                 st.markdown("### Delete Course")
                 course_code = st.selectbox("Select Course to Delete", self.df["CourseCode"])
+                self.show_dependents(course_code)
                 col1, col2 = st.columns(2)
                 with col1:
                     confirm = st.checkbox("Confirm deletion")
@@ -575,19 +2111,316 @@ class KnowledgeBase:
                     st.session_state.admin_action = None
                     st.rerun()
 
+            elif st.session_state.admin_action == "Bulk Import":
+                st.markdown("### Bulk Import")
+                st.markdown("Upload a CSV or JSON file with the catalog columns. All rows are checked "
+                            "together and nothing is saved unless every row is valid.")
+                uploaded = st.file_uploader("Course file (CSV or JSON)", type=["csv", "json"])
+                replace = st.checkbox("Replace the whole catalog with this file")
+                col1, col2 = st.columns(2)
+                with col1:
+                    validate_button = st.button("Validate Only")
+                with col2:
+                    import_button = st.button("Import Courses")
+                if uploaded is not None and (validate_button or import_button):
+                    try:
+                        courses, report = self.import_courses(uploaded, replace=replace,
+                                                              dry_run=validate_button, name=uploaded.name)
+                        if not report.empty:
+                            st.error(f"{len(report)} problems in {report['Row'].nunique()} rows; "
+                                     f"nothing was imported.")
+                            st.dataframe(report, use_container_width=True, hide_index=True)
+                            st.download_button("Download Report", report.to_csv(index=False),
+                                               file_name="import_report.csv", mime="text/csv")
+                        elif validate_button:
+                            st.success(f"All {len(courses)} courses are valid.")
+                        else:
+                            st.success(f"Imported {len(courses)} courses"
+                                       + (" as the new catalog." if replace else "."))
+                    except ValueError as e:
+                        st.error(f"Error importing courses: {str(e)}")
+                        logger.error(f"Error importing courses: {str(e)}")
+                elif import_button or validate_button:
+                    st.warning("Please upload a course file first.")
+                if st.button("⬅️ Back"):
+                    st.session_state.admin_action = None
+                    st.rerun()
+
+# AdvisingTrace Class
+class AdvisingTrace:
+    """Timing and rule statistics for one advising request.
+
+    Phases: ``catalog_load`` (KnowledgeBase), ``declare`` (building the engine
+    and declaring facts, which also runs Rete matching for them), ``run``
+    (matching and rule firing), ``render`` (showing the results) and, when
+    requested, ``plan`` (GraduationPlanner). Recommenders report failures
+    through ``error()`` rather than Streamlit, so they also run headless;
+    the caller decides how to show ``errors``.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.phases = {}
+        self.rule_activations = collections.Counter()
+        self.rule_firings = collections.Counter()
+        self.max_agenda_size = 0
+        self.state_modifications = 0
+        self.courses_declared = 0
+        self.recommendations = 0
+        self.cache_hit = False
+        self.errors = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def error(self, message):
+        self.errors.append(message)
+
+    def as_record(self):
+        phases_ms = {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        phases_ms["total"] = round(sum(self.phases.values()) * 1000, 3)
+        return {
+            "backend": self.backend,
+            "phases_ms": phases_ms,
+            "rule_activations": dict(self.rule_activations),
+            "rule_firings": dict(self.rule_firings),
+            "max_agenda_size": self.max_agenda_size,
+            "state_modifications": self.state_modifications,
+            "courses_declared": self.courses_declared,
+            "recommendations": self.recommendations,
+            "cache_hit": self.cache_hit,
+            "errors": len(self.errors),
+        }
+
+    def log(self):
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("advising_trace %s", json.dumps(self.as_record(), sort_keys=True))
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+class AdvisingMetrics:
+    """Process-wide aggregate of the most recent advising traces."""
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._records = collections.deque(maxlen=window)
+        self.requests = 0
+
+    def record(self, trace):
+        record = trace.as_record()
+        with self._lock:
+            self._records.append(record)
+            self.requests += 1
+        return record
+
+    def summary(self):
+        with self._lock:
+            records = list(self._records)
+        phases = sorted({name for r in records for name in r["phases_ms"]})
+        rows = []
+        for name in phases:
+            values = sorted(r["phases_ms"][name] for r in records if name in r["phases_ms"])
+            rows.append({
+                "Phase": name,
+                "Samples": len(values),
+                "p50 (ms)": round(_percentile(values, 50), 3),
+                "p95 (ms)": round(_percentile(values, 95), 3),
+                "p99 (ms)": round(_percentile(values, 99), 3),
+            })
+        rules = collections.defaultdict(lambda: {"Activations": 0, "Firings": 0})
+        for r in records:
+            for rule, count in r["rule_activations"].items():
+                rules[rule]["Activations"] += count
+            for rule, count in r["rule_firings"].items():
+                rules[rule]["Firings"] += count
+        return {
+            "requests": self.requests,
+            "window": len(records),
+            "phases": rows,
+            "rules": [{"Rule": rule, **counts} for rule, counts in sorted(rules.items())],
+            "max_agenda_size": max((r["max_agenda_size"] for r in records), default=0),
+            "state_modifications_p95": _percentile(sorted(r["state_modifications"] for r in records), 95),
+        }
+
+@st.cache_resource
+def get_advising_metrics():
+    return AdvisingMetrics()
+
+class RecommendationCache:
+    """Process-wide LRU of finished recommendations and their explanations.
+
+    Students at the same point of the program often submit identical
+    inputs. Results are keyed by catalog version, backend, semester, track,
+    credit limit, level and the passed/failed sets (see ``key()``), so a result of
+    an older catalog never matches. Entries are evicted least recently used
+    beyond ``max_entries``, after ``ttl`` seconds, and when their catalog is
+    saved (``invalidate()``).
+    """
+    def __init__(self, max_entries=None, ttl=None, env=os.environ):
+        self.max_entries = int(env.get("ADVISOR_RESULT_CACHE_SIZE", "1024")) if max_entries is None else max_entries
+        self.ttl = float(env.get("ADVISOR_RESULT_CACHE_TTL", "600")) if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(catalog, backend, semester, track, cgpa, level, passed_courses, failed_courses):
+        """``catalog`` is a (store key, snapshot generation) pair."""
+        return (catalog, backend, semester, track, credit_limit_for(cgpa), str(level),
+                frozenset(passed_courses or []), frozenset(failed_courses or []))
+
+    def get(self, key):
+        """(recommendations, explanations) or None; recommendations is a
+        fresh list, explanations an ``ExplanationSystem.state()``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [list(course) for course in entry[1]], entry[2]
+
+    def put(self, key, recommendations, explanations):
+        entry = (time.monotonic(), tuple(tuple(course) for course in recommendations), explanations)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, store_key):
+        """Drop every result computed from the catalog stored at ``store_key``."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0][0] == store_key]
+            for key in stale:
+                del self._entries[key]
+            self.evictions += len(stale)
+        if stale:
+            logger.info("Dropped %d cached recommendations for %s", len(stale), store_key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+@st.cache_resource
+def get_result_cache():
+    return RecommendationCache()
+
+def render_diagnostics_panel():
+    summary = get_advising_metrics().summary()
+    st.markdown("### Engine Diagnostics")
+    st.caption(f"{summary['window']} most recent of {summary['requests']} advising requests in this process.")
+    cache = get_result_cache().stats()
+    st.caption(f"Result cache: {cache['hit_rate']:.0%} hit rate ({cache['hits']} hits, {cache['misses']} misses), "
+               f"{cache['entries']} entries, {cache['evictions']} evicted.")
+    if not summary["window"]:
+        st.info("No advising requests recorded yet.")
+        return
+    st.dataframe(pd.DataFrame(summary["phases"]), use_container_width=True)
+    if summary["rules"]:
+        st.dataframe(pd.DataFrame(summary["rules"]), use_container_width=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Max Agenda Size", summary["max_agenda_size"])
+    with col2:
+        st.metric("State Modifications (p95)", summary["state_modifications_p95"])
+
+def credit_limit_for(cgpa):
+    if cgpa < 2.0:
+        return 12
+    elif cgpa < 3.0:
+        return 15
+    else:
+        return 18
+
 # RecommendationEngine Class
-class Course(Fact):
-    pass
+@st.cache_resource
+def get_rule_engine():
+    """Import the rule engine (and Experta) on first use, so that the
+    welcome page and the native backends never load it. Returns the
+    ``rule_engine`` module, which holds ``RecommendationEngine`` and its
+    fact and strategy classes."""
+    import rule_engine
+
+    rule_engine.bind(sys.modules[__name__])
+    return rule_engine
+
+RULE_ENGINE_NAMES = ("TracingDepthStrategy", "Course", "Student", "RecommendationState", "RecommendationEngine")
+
+def __getattr__(name):
+    # ``ProjKbs.RecommendationEngine`` and friends for modules importing this one.
+    if name in RULE_ENGINE_NAMES:
+        return getattr(get_rule_engine(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# EngineTemplatePool Class
+class EngineTemplatePool:
+    """Idle template engines keyed by (semester, track), tagged with the
+    catalog index they were built from.
+
+    An engine is checked out by one request at a time, so sessions running
+    concurrently never share an instance. Engines built from an older
+    catalog version are dropped instead of being reused.
+    """
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.builds = 0
+        self.reuses = 0
+
+    def acquire(self, kb, index, semester, track):
+        key = (semester, track)
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                engine = idle.pop()
+                if engine.index is index:
+                    self.reuses += 1
+                    return engine
+            self.builds += 1
+        started = time.perf_counter()
+        engine = get_rule_engine().RecommendationEngine.template(kb, index, semester, track)
+        logger.info(f"Built engine template for {key} in {time.perf_counter() - started:.4f}s (builds={self.builds}, reuses={self.reuses})")
+        return engine
 
-class Student(Fact):
-    pass
+    def release(self, engine):
+        key = (engine.semester, engine.track)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(engine)
 
-class RecommendationState(Fact):
-    pass
+@st.cache_resource
+def get_engine_pool():
+    return EngineTemplatePool()
 
-class RecommendationEngine(KnowledgeEngine):
-    def __init__(self, semester, cgpa, passed_courses, failed_courses, kb, explanation_system, level, track="Big Data Analytics"):
-        super().__init__()
+class PooledRecommendationEngine:
+    """RecommendationEngine running on a pooled template: only the student's
+    facts are declared per request."""
+    def __init__(self, semester, cgpa, passed_courses, failed_courses, kb, explanation_system, level, track=None, index=None, trace=None):
         self.semester = semester
         self.cgpa = cgpa
         self.passed_courses = passed_courses or []
@@ -596,233 +2429,627 @@ class RecommendationEngine(KnowledgeEngine):
         self.explanation_system = explanation_system
         self.track = track
         self.level = level
+        self.index = index if index is not None else get_catalog_index(kb)
+        if self.track is None:
+            self.track = default_track(self.index)
+        self.trace = trace or AdvisingTrace("experta")
 
-        try:
-            self.reset()
-            self.declare(Student(
-                cgpa=cgpa,
-                passed=self.passed_courses,
-                failed=self.failed_courses,
-                level=level
-            ))
-            self.declare(RecommendationState(
-                courses=[],
-                total_credits=0
-            ))
-            if not kb.empty:
-                for _, row in kb.iterrows():
-                    if row["Track"] in (self.track, "All") and row["SemesterOffered"] in (self.semester, "Both"):
-                        self.declare(Course(
-                            code=row["CourseCode"],
-                            name=row["CourseName"],
-                            prerequisites=row["Prerequisites"].split(",") if row["Prerequisites"] else [],
-                            corequisites=row["CoRequisites"].split(",") if row["CoRequisites"] else [],
-                            credits=int(row["CreditHours"]),
-                            semester=str(row["SemesterOffered"]),
-                            level=row["Level"]
-                        ))
-            else:
-                logger.warning("Knowledge base is empty. No courses to declare.")
-        except Exception as e:
-            logger.error(f"Error initializing RecommendationEngine: {str(e)}")
-            st.error(f"Failed to initialize recommendation engine: {str(e)}")
+    def get_recommendations(self):
+        pool = get_engine_pool()
+        with self.trace.phase("declare"):
+            engine = pool.acquire(self.kb, self.index, self.semester, self.track)
+            engine.set_trace(self.trace)
+            self.trace.courses_declared = len(engine.facts) - 1
+            engine.prepare(self.cgpa, self.passed_courses, self.failed_courses, self.explanation_system, self.level)
+        recommendations = engine.get_recommendations()
+        engine.clear_student()
+        engine.set_trace(AdvisingTrace("template"))
+        pool.release(engine)
+        return recommendations
 
-    @DefFacts()
-    def _initial_facts(self):
-        try:
-            if self.cgpa < 2.0:
-                yield Fact(credit_limit=12)
-            elif self.cgpa < 3.0:
-                yield Fact(credit_limit=15)
-            else:
-                yield Fact(credit_limit=18)
-        except Exception as e:
-            logger.error(f"Error in _initial_facts: {str(e)}")
-
-    @Rule(
-        Fact(credit_limit=MATCH.limit),
-        Course(
-            code=MATCH.code,
-            name=MATCH.name,
-            prerequisites=MATCH.prereqs,
-            corequisites=MATCH.coreqs,
-            credits=MATCH.credits,
-            semester=MATCH.sem,
-            level=MATCH.course_level
-        ),
-        Student(passed=MATCH.passed, failed=MATCH.failed, level=MATCH.student_level),
-        RecommendationState(courses=MATCH.courses, total_credits=MATCH.total_credits),
-        TEST(lambda prereqs, passed: all(p.strip() in passed or p.strip() == "" for p in prereqs)),
-        TEST(lambda coreqs, passed, courses: all(c.strip() in passed or c.strip() in [r[0] for r in courses] or c.strip() == "" for c in coreqs)),
-        TEST(lambda credits, limit, total_credits: total_credits + credits <= limit),
-        TEST(lambda code, failed: code in failed),
-        TEST(lambda code, courses: code not in [c[0] for c in courses]),
-        TEST(lambda course_level, student_level: int(course_level) <= int(student_level)),
-        salience=5
-    )
-    def recommend_failed_course(self, code, name, credits, course_level, courses, total_credits):
-        try:
-            new_courses = list(courses) + [[code, name, credits, course_level]]
-            new_total_credits = total_credits + credits
-            for fact_id, fact in self.facts.items():
-                if isinstance(fact, RecommendationState):
-                    self.modify(self.facts[fact_id], 
-                                courses=new_courses, 
-                                total_credits=new_total_credits)
-                    self.explanation_system.add_explanation(
-                        f"{code} is recommended because you failed it previously and its prerequisites are met. "
-                        f"Course Level: {course_level}, Your Level: {self.level}."
-                    )
-                    logger.debug(f"Recommended failed course: {code}")
-                    break
-            else:
-                logger.error("No RecommendationState fact found")
-                st.error("Failed to update recommendations: RecommendationState not found")
-        except Exception as e:
-            logger.error(f"Error in recommend_failed_course: {str(e)}")
-            st.error(f"Error recommending failed course: {str(e)}")
-
-    @Rule(
-        Fact(credit_limit=MATCH.limit),
-        Course(
-            code=MATCH.code,
-            name=MATCH.name,
-            prerequisites=MATCH.prereqs,
-            corequisites=MATCH.coreqs,
-            credits=MATCH.credits,
-            semester=MATCH.sem,
-            level=MATCH.course_level
-        ),
-        Student(passed=MATCH.passed, failed=MATCH.failed, level=MATCH.student_level),
-        RecommendationState(courses=MATCH.courses, total_credits=MATCH.total_credits),
-        TEST(lambda prereqs, passed: all(p.strip() in passed or p.strip() == "" for p in prereqs)),
-        TEST(lambda coreqs, passed, courses: all(c.strip() in passed or c.strip() in [r[0] for r in courses] or c.strip() == "" for c in coreqs)),
-        TEST(lambda credits, limit, total_credits: total_credits + credits <= limit),
-        TEST(lambda code, passed, failed: code not in passed and code not in failed),
-        TEST(lambda code, courses: code not in [c[0] for c in courses]),
-        TEST(lambda course_level, student_level: int(course_level) <= int(student_level)),
-        salience=5
-    )
-    def recommend_new_course(self, code, name, credits, prereqs, course_level, courses, total_credits):
-        try:
-            new_courses = list(courses) + [[code, name, credits, course_level]]
-            new_total_credits = total_credits + credits
-            for fact_id, fact in self.facts.items():
-                if isinstance(fact, RecommendationState):
-                    self.modify(self.facts[fact_id], 
-                                courses=new_courses, 
-                                total_credits=new_total_credits)
-                    self.explanation_system.add_explanation(
-                        f"{code} is recommended because you passed its prerequisites: "
-                        f"{', '.join(prereqs) if prereqs else 'None'}. "
-                        f"Course Level: {course_level}, Your Level: {self.level}."
-                    )
-                    logger.debug(f"Recommended new course: {code}")
-                    break
+# NativeRecommender Class
+class NativeRecommender:
+    """Rule-for-rule equivalent of RecommendationEngine without Experta.
+
+    Takes the same arguments and returns the same recommendations and
+    explanation strings, in the same order. The engine's two recommending
+    rules share one salience, so Experta fires them in reverse declaration
+    order (newest Course fact first). Selecting a course can satisfy another
+    course's co-requisite, which makes that course eligible again.
+    Unavailable-course explanations are deferred the same way as the
+    engine's (``unavailable_explanations()``).
+    ``equivalence_check.py`` compares the two on random profiles.
+    Only the shards of the student's (track, semester) are read.
+    ``prereqs_met`` may carry this student's row of
+    ``CatalogIndex.prereqs_met_many()`` over ``offered_rows()`` when
+    requests are batched.
+    """
+    def __init__(self, semester, cgpa, passed_courses, failed_courses, kb, explanation_system, level, track=None, index=None, trace=None, prereqs_met=None):
+        self.semester = semester
+        self.cgpa = cgpa
+        self.passed_courses = passed_courses or []
+        self.failed_courses = failed_courses or []
+        self.kb = kb
+        self.explanation_system = explanation_system
+        self.track = track
+        self.level = level
+        self.trace = trace or AdvisingTrace("native")
+        self.prereqs_met = prereqs_met
+        with self.trace.phase("declare"):
+            self.index = index if index is not None else get_catalog_index(kb)
+        if self.track is None:
+            self.track = default_track(self.index)
+        self.offered = None
+
+    def _offered(self, passed_mask):
+        """The rows offered to the student and whether their prerequisites are met."""
+        if self.offered is None:
+            index = self.index
+            if self.prereqs_met is None:
+                self.offered = index.offered_prereqs_met(self.semester, self.track, index.id_array(passed_mask))
             else:
-                logger.error("No RecommendationState fact found")
-                st.error("Failed to update recommendations: RecommendationState not found")
-        except Exception as e:
-            logger.error(f"Error in recommend_new_course: {str(e)}")
-            st.error(f"Error recommending new course: {str(e)}")
-
-    @Rule(
-        Course(
-            code=MATCH.code,
-            prerequisites=MATCH.prereqs
-        ),
-        Student(passed=MATCH.passed),
-        TEST(lambda prereqs, passed: any(p.strip() not in passed and p.strip() != "" for p in prereqs))
-    )
-    def unmet_prerequisites(self, code, prereqs, passed):
-        try:
-            unmet = [p.strip() for p in prereqs if p.strip() not in passed and p.strip() != ""]
-            self.explanation_system.add_explanation(
-                f"{code} is not available due to unmet prerequisites: {', '.join(unmet)}."
-            )
-            logger.debug(f"Unmet prerequisites for {code}: {unmet}")
-        except Exception as e:
-            logger.error(f"Error in unmet_prerequisites: {str(e)}")
+                self.offered = (index.offered_rows(self.semester, self.track), self.prereqs_met)
+        return self.offered
+
+    def _candidates(self, passed_mask, failed_mask):
+        """Offered rows the student may take (prerequisites met, level
+        allowed, not passed unless failed), ascending."""
+        index = self.index
+        rows, prereqs_met = self._offered(passed_mask)
+        passed = _members(rows, index.id_array(passed_mask))
+        failed = _members(rows, index.id_array(failed_mask))
+        return rows[prereqs_met & (index.levels[rows] <= int(self.level)) & (failed | ~passed)].tolist()
+
+    def _select(self, passed_mask, failed_mask, limit):
+        index = self.index
+        candidates = self._candidates(passed_mask, failed_mask)
+        credit_of = dict(zip(candidates, index.credits[candidates].tolist()))
+        selected_mask = 0
+        total_credits = 0
+        courses = []
+        pending = []
+        for cid in reversed(candidates):
+            ready = [-cid]
+            while ready:
+                cid = -heapq.heappop(ready)
+                credits = credit_of[cid]
+                if total_credits + credits > limit:
+                    # Totals only grow, so this course can never fit again.
+                    continue
+                if not index.corequisites_met(cid, passed_mask | selected_mask):
+                    pending.append(cid)
+                    continue
+                selected_mask |= 1 << cid
+                total_credits += credits
+                courses.append((cid, bool(failed_mask >> cid & 1)))
+                still_pending = []
+                for p in pending:
+                    if not index.corequisites_met(p, passed_mask | selected_mask):
+                        still_pending.append(p)
+                    else:
+                        # Declared after everything still unvisited, so it
+                        # fires before them; newest first.
+                        heapq.heappush(ready, -p)
+                pending = still_pending
+        return courses
 
     def get_recommendations(self):
+        with self.trace.phase("run"):
+            return self._recommend()
+
+    def _recommend(self):
         try:
-            self.run()
-            for fact_id, fact in self.facts.items():
-                if isinstance(fact, RecommendationState):
-                    if 'courses' in fact:
-                        seen_codes = set()
-                        unique_courses = []
-                        for course in fact['courses']:
-                            code = course[0]
-                            if code not in seen_codes:
-                                seen_codes.add(code)
-                                unique_courses.append(course)
-                        logger.debug(f"Returning deduplicated recommendations: {unique_courses}")
-                        return unique_courses
+            index = self.index
+            passed_mask = index.mask_of(self.passed_courses)
+            failed_mask = index.mask_of(self.failed_courses)
+            try:
+                limit = credit_limit_for(self.cgpa)
+            except Exception as e:
+                logger.error(f"Error in _initial_facts: {str(e)}")
+                limit = None
+
+            recommendations = []
+            if limit is not None:
+                for cid, was_failed in self._select(passed_mask, failed_mask, limit):
+                    code = index.codes[cid]
+                    course_level = index.level_values[cid]
+                    recommendations.append([code, index.names[cid], index.credit_values[cid], course_level])
+                    self.trace.rule_firings["recommend_failed_course" if was_failed else "recommend_new_course"] += 1
+                    if was_failed:
+                        self.explanation_system.add(Explanation(code, "failed", (), (), course_level, self.level))
                     else:
-                        logger.error("RecommendationState fact does not have 'courses' attribute")
-                        st.error("RecommendationState missing 'courses' attribute")
-                        return []
-            logger.warning("No RecommendationState fact found in get_recommendations")
-            return []
+                        self.explanation_system.add(Explanation(code, "new", tuple(index.prereq_raw[cid]), (),
+                                                                course_level, self.level))
+
+            self.explanation_system.defer(functools.partial(
+                unavailable_explanations, index, self.semester, self.track, passed_mask, self._offered(passed_mask)))
+            self.trace.courses_declared = len(self._offered(passed_mask)[0])
+            self.trace.recommendations = len(recommendations)
+            logger.debug("Returning native recommendations: %s", recommendations)
+            return recommendations
         except Exception as e:
             logger.error(f"Error getting recommendations: {str(e)}")
-            st.error(f"Failed to get recommendations: {str(e)}")
+            self.trace.error(f"Failed to get recommendations: {str(e)}")
+            return []
+
+class OptimalRecommender(NativeRecommender):
+    """Chooses the credit-limited course set by dynamic programming instead
+    of rule-firing order; explanations are worded as in NativeRecommender.
+
+    Selection is a 0/1 multiple-choice knapsack with the credit limit as
+    capacity. A failed course outweighs any combination of other courses, so
+    failed courses are taken first. Beyond that a course is worth its unlock
+    depth (the longest prerequisite chain it starts, from PrerequisiteGraph),
+    with credits as the tie-breaker, so unused credits are only left when
+    nothing else fits. A course whose co-requisites are not passed yet is
+    only taken together with them: each group of courses linked by
+    co-requisites contributes at most one union of its feasible bundles
+    (all unions for small groups, else single bundles or the whole group). The
+    capacity is at most 18 credits, and only the best ``limit // w`` single
+    courses of each credit weight ``w`` can be part of an optimum, so the
+    table stays tiny however large the catalog is.
+    """
+    MAX_UNION_BUNDLES = 6
+
+    def _select(self, passed_mask, failed_mask, limit):
+        index = self.index
+        height = index.graph.height
+        candidate_ids = self._candidates(passed_mask, failed_mask)
+        if not candidate_ids:
             return []
 
+        scale = limit + 1
+        value = {cid: max(int(height[cid]), 1) * scale + index.credit_values[cid] for cid in candidate_ids}
+        mandatory = sum(value.values()) + 1
+        for cid in candidate_ids:
+            if failed_mask >> cid & 1:
+                value[cid] += mandatory
+
+        singles = collections.defaultdict(list)
+        items = []
+        for options in index.corequisite_groups(candidate_ids, passed_mask, self.MAX_UNION_BUNDLES):
+            weighted = [(sum(index.credit_values[c] for c in bundle), sum(value[c] for c in bundle), bundle)
+                        for bundle in options]
+            weighted = [option for option in weighted if option[0] <= limit]
+            if len(weighted) == 1 and len(weighted[0][2]) == 1:
+                singles[weighted[0][0]].append(weighted[0])
+            elif weighted:
+                items.append(weighted)
+        for weight, options in singles.items():
+            best = heapq.nlargest(limit // weight, options, key=lambda o: (o[1], -min(o[2])))
+            items.extend([option] for option in best)
+
+        # best[w]: highest value with exactly w credits (-1: unreachable)
+        best = [0] + [-1] * limit
+        picks = []
+        for options in items:
+            updated = best[:]
+            pick = [None] * (limit + 1)
+            for i, (weight, gain, _) in enumerate(options):
+                for cap in range(limit, weight - 1, -1):
+                    if best[cap - weight] >= 0 and best[cap - weight] + gain > updated[cap]:
+                        updated[cap] = best[cap - weight] + gain
+                        pick[cap] = i
+            picks.append(pick)
+            best = updated
+
+        cap = max(range(limit + 1), key=lambda w: (best[w], -w))
+        chosen = []
+        for options, pick in zip(reversed(items), reversed(picks)):
+            if pick[cap] is not None:
+                weight, _, bundle = options[pick[cap]]
+                chosen.extend(bundle)
+                cap -= weight
+        chosen.sort(key=lambda cid: (-value[cid], cid))
+        return [(cid, bool(failed_mask >> cid & 1)) for cid in chosen]
+
+def fresh_recommendation_engine(*args, **kwargs):
+    """A new RecommendationEngine for one request (imports Experta on first use)."""
+    return get_rule_engine().RecommendationEngine(*args, **kwargs)
+
+RECOMMENDERS = {
+    "experta": PooledRecommendationEngine,
+    "experta-fresh": fresh_recommendation_engine,
+    "native": NativeRecommender,
+    "optimal": OptimalRecommender,
+}
+
+def recommender_backend(backend=None):
+    return backend or os.environ.get("ADVISOR_RECOMMENDER", "experta")
+
+def uses_prereqs_met(backend=None):
+    """Whether ``backend`` uses a precomputed ``prereqs_met`` (the native
+    backends do; Experta checks prerequisites in its rules)."""
+    recommender = RECOMMENDERS.get(recommender_backend(backend))
+    return isinstance(recommender, type) and issubclass(recommender, NativeRecommender)
+
+def make_recommender(semester, cgpa, passed_courses, failed_courses, kb, explanation_system, level,
+                     track=None, backend=None, index=None, trace=None, prereqs_met=None):
+    """Build the recommender selected by ``backend`` or the ``ADVISOR_RECOMMENDER``
+    environment variable: ``experta`` (default, pooled engine templates),
+    ``experta-fresh`` (a new engine per request), ``native`` or ``optimal``
+    (knapsack selection, see OptimalRecommender). ``track`` defaults to
+    ``default_track()``. ``prereqs_met`` (from
+    ``CatalogIndex.prereqs_met_many()`` over ``offered_rows()``) is used by
+    the native backends and ignored by Experta."""
+    backend = recommender_backend(backend)
+    if backend not in RECOMMENDERS:
+        raise ValueError(f"Unknown recommender backend: {backend}")
+    if trace is not None:
+        trace.backend = backend
+    options = {"prereqs_met": prereqs_met} if uses_prereqs_met(backend) else {}
+    return RECOMMENDERS[backend](semester, cgpa, passed_courses, failed_courses, kb, explanation_system, level,
+                       track=track, index=index, trace=trace, **options)
+
+# GraduationPlanner Class
+class GraduationPlanner:
+    """Plans the remaining semesters to graduation.
+
+    Terms alternate Fall/Spring from ``semester`` and the student's level
+    rises by one every two terms, up to the highest level in the catalog.
+    Each term takes courses that are eligible under the recommenders' rules:
+    offered that semester for the track, level allowed, prerequisites passed
+    in an earlier term, co-requisites passed or taken in the same term, and
+    the CGPA credit limit. The goal is every course of the track that can
+    still be completed; the others are reported as ``unreachable``. If the
+    search finds no plan for the goal, its courses are reported as
+    ``unplanned``.
+
+    The search is A* over (completed courses, term) states. Each state is
+    expanded once, and the eligible options and lower bound of a completed
+    set are memoized. The lower bound is the larger of the longest remaining
+    prerequisite chain and the remaining credits over the limit. A term only
+    branches on maximal course sets (no further course fits), at most
+    ``branching`` of them, built from the ``max_candidates`` eligible courses
+    that come first: failed courses, then the longest chains ahead. A greedy plan
+    seeds the search, so when ``time_budget`` (seconds, default
+    ``ADVISOR_PLAN_BUDGET``) runs out the best plan so far is returned. The
+    plan is marked ``optimal`` only when it meets the lower bound or the
+    search finished without cutting any branches.
+    """
+    SEMESTERS = ("Fall", "Spring")
+
+    def __init__(self, index, cgpa, passed_courses, failed_courses, level, semester,
+                 track=None, time_budget=None, branching=6, max_candidates=48):
+        if semester not in self.SEMESTERS:
+            raise ValueError(f"Unknown semester: {semester}")
+        self.index = index
+        self.graph = index.graph
+        self.limit = credit_limit_for(cgpa)
+        self.passed_mask = index.mask_of(passed_courses or [])
+        self.failed_mask = index.mask_of(failed_courses or [])
+        self.level = int(level)
+        self.semester = semester
+        self.track = track if track is not None else default_track(index)
+        if time_budget is None:
+            time_budget = float(os.environ.get("ADVISOR_PLAN_BUDGET", "0.5"))
+        self.time_budget = time_budget
+        self.branching = branching
+        known = index.levels[index.levels != UNKNOWN_LEVEL]
+        self.max_level = max(self.level, int(known.max()) if known.size else self.level)
+        self._rank = {cid: position for position, cid in enumerate(self.graph.order)}
+        self._bounds = {}
+        self._options = {}
+        self.truncated = False
+        self.goal_mask = self._goal()
+        self._goal_rows = index.to_array(self.goal_mask)[:index.size]
+        # Lower sorts first: failed courses, then the longest chains ahead.
+        failed = index.to_array(self.failed_mask)[:index.size].astype(np.int64)
+        self._priority = -(failed << 40 | self.graph.height[:index.size].astype(np.int64).clip(0) << 8
+                           | index.credits.astype(np.int64))
+        self.max_candidates = max_candidates
+        # Every two terms reach both semesters, so each pair of terms past
+        # the top level completes at least one remaining course.
+        self.max_terms = 2 * (bin(self.goal_mask).count("1") + self.max_level - self.level + 1)
+
+    def _goal(self):
+        """Greatest set of unpassed track courses whose prerequisites and
+        co-requisites are all passed or in the set themselves, leaving out
+        courses that can never be taken: those on a cycle of prerequisites and
+        co-requisites that has a prerequisite in it (e.g. a co-requisite that
+        requires the course first) or that is over the credit limit, and
+        those that require them."""
+        index = self.index
+        offered = index.offered("Fall", self.track) | index.offered("Spring", self.track)
+        offered &= index.levels <= self.max_level
+        excluded = set(self.graph.cyclic) | set(self.graph.blocked)
+        goal = 0
+        for cid in np.flatnonzero(offered).tolist():
+            if cid not in excluded and not self.passed_mask >> cid & 1:
+                goal |= 1 << cid
+        # Co-requisites may be taken in the same term, prerequisites only
+        # earlier: a cycle through a prerequisite can never be scheduled, and
+        # a cycle of co-requisites must fit into one term.
+        needs = {cid: [other for other in index.prerequisites(cid) + index.corequisites(cid) if goal >> other & 1]
+                 for cid in index.ids_of(goal)}
+        for component in strongly_connected_components(needs):
+            members = set(component)
+            if (any(other in members for cid in component for other in index.prerequisites(cid))
+                    or sum(index.credit_values[cid] for cid in component) > self.limit):
+                for cid in component:
+                    goal &= ~(1 << cid)
+        changed = True
+        while changed:
+            changed = False
+            reachable = self.passed_mask | goal
+            for cid in index.ids_of(goal):
+                if any(not reachable >> other & 1 for other in index.prerequisites(cid) + index.corequisites(cid)):
+                    goal &= ~(1 << cid)
+                    changed = True
+        return goal
+
+    def semester_of(self, term):
+        return self.SEMESTERS[(self.SEMESTERS.index(self.semester) + term) % 2]
+
+    def level_of(self, term):
+        return min(self.level + term // 2, self.max_level)
+
+    def lower_bound(self, done):
+        """Terms still needed at least once ``done`` is completed."""
+        remaining = self.goal_mask & ~done
+        bound = self._bounds.get(remaining)
+        if bound is None:
+            index = self.index
+            chain = {}
+            for cid in sorted(index.ids_of(remaining), key=self._rank.__getitem__):
+                chain[cid] = 1 + max((chain[p] for p in index.prerequisites(cid) if remaining >> p & 1), default=0)
+            credits = sum(index.credit_values[cid] for cid in chain)
+            bound = max(max(chain.values(), default=0), -(-credits // self.limit))
+            self._bounds[remaining] = bound
+        return bound
+
+    def options(self, done, term):
+        """Maximal course sets (as bitsets) that can be taken in ``term``
+        once ``done`` is completed; ``[0]`` when nothing can be taken."""
+        semester, level = self.semester_of(term), self.level_of(term)
+        key = (done, semester, level)
+        found = self._options.get(key)
+        if found is not None:
+            return found
+        index = self.index
+        priority = self._priority
+        eligible = index.eligible(done, level, semester, self.track) & self._goal_rows
+        candidate_ids = np.flatnonzero(eligible & ~index.to_array(done)[:index.size])
+        if len(candidate_ids) > self.max_candidates:
+            self.truncated = True
+            keep = np.argsort(self._priority[candidate_ids], kind="stable")[:self.max_candidates]
+            candidate_ids = np.sort(candidate_ids[keep])
+        candidate_ids = candidate_ids.tolist()
+        units = []
+        for options in index.corequisite_groups(candidate_ids, done):
+            for bundle in options:
+                credits = sum(index.credit_values[cid] for cid in bundle)
+                if credits <= self.limit:
+                    rank = (min(int(priority[cid]) for cid in bundle), -credits, min(bundle))
+                    units.append((rank, credits, sum(1 << cid for cid in bundle)))
+        units.sort()
+
+        found = []
+        steps = self.branching * 32
+        stack = [(0, 0, 0, ())]
+        while stack and len(found) < self.branching and steps:
+            steps -= 1
+            i, chosen, credits, skipped = stack.pop()
+            while i < len(units) and (credits + units[i][1] > self.limit or units[i][2] & chosen):
+                # Totals only grow, so this unit can never be added later.
+                i += 1
+            if i == len(units):
+                if not any(credits + c <= self.limit and not m & chosen for _, c, m in skipped):
+                    if chosen not in found:
+                        found.append(chosen)
+                continue
+            _, unit_credits, unit_mask = units[i]
+            stack.append((i + 1, chosen, credits, skipped + (units[i],)))
+            stack.append((i + 1, chosen | unit_mask, credits + unit_credits, skipped))
+        if stack:
+            self.truncated = True
+        found = found or [0]
+        self._options[key] = found
+        return found
+
+    def _greedy(self):
+        done, path = self.passed_mask, []
+        while self.goal_mask & ~done and len(path) < self.max_terms:
+            taken = self.options(done, len(path))[0]
+            path.append(taken)
+            done |= taken
+        return path if not self.goal_mask & ~done else None
+
+    def plan(self):
+        """Search for the shortest plan; see the class docstring."""
+        started = time.perf_counter()
+        deadline = started + self.time_budget
+        lower_bound = self.lower_bound(self.passed_mask)
+        best = self._greedy()
+        limit = len(best) if best is not None else self.max_terms + 1
+        finished = True
+        expanded = 0
+        start = (self.passed_mask, 0)
+        parents = {start: None}
+        heap = [(lower_bound, 0, 0, self.passed_mask)]
+        counter = itertools.count(1)
+        while heap:
+            f, _, g, done = heapq.heappop(heap)
+            if f >= limit:
+                break
+            if not self.goal_mask & ~done:
+                best, limit = self._path_to((done, g), parents), g
+                break
+            if time.perf_counter() > deadline:
+                finished = False
+                break
+            expanded += 1
+            for taken in self.options(done, g):
+                child = (done | taken, g + 1)
+                if child in parents:
+                    continue
+                bound = g + 1 + self.lower_bound(child[0])
+                if bound < limit:
+                    parents[child] = ((done, g), taken)
+                    heapq.heappush(heap, (bound, -next(counter), g + 1, child[0]))
+
+        optimal = best is not None and (len(best) == lower_bound or (finished and not self.truncated))
+        elapsed = time.perf_counter() - started
+        logger.info("Planned %s terms for %d courses in %.4fs (expanded=%d, optimal=%s)",
+                    len(best) if best is not None else None, bin(self.goal_mask).count("1"),
+                    elapsed, expanded, optimal)
+        return {
+            "terms": self._describe(best or []),
+            "optimal": optimal,
+            "lower_bound": lower_bound,
+            "unreachable": self.unreachable(),
+            "unplanned": self.index.codes_of(self.goal_mask) if best is None else [],
+            "expanded": expanded,
+            "elapsed": elapsed,
+        }
+
+    @staticmethod
+    def _path_to(key, parents):
+        path = []
+        while parents[key] is not None:
+            key, taken = parents[key]
+            path.append(taken)
+        return path[::-1]
+
+    def unreachable(self):
+        """Unpassed track courses the plan cannot include."""
+        index = self.index
+        offered = index.offered("Fall", self.track) | index.offered("Spring", self.track)
+        return [index.codes[cid] for cid in np.flatnonzero(offered).tolist()
+                if not (self.passed_mask | self.goal_mask) >> cid & 1]
+
+    def _describe(self, path):
+        index = self.index
+        terms = []
+        for term, taken in enumerate(path):
+            courses = [[index.codes[cid], index.names[cid], index.credit_values[cid], index.level_values[cid]]
+                       for cid in index.ids_of(taken)]
+            terms.append({
+                "semester": self.semester_of(term),
+                "level": str(self.level_of(term)),
+                "courses": courses,
+                "credits": sum(course[2] for course in courses),
+            })
+        return terms
+
+def explanations_expander(label):
+    """An expander that reruns the app when toggled, and whether it is open.
+    Streamlit versions without expander state report it as always open."""
+    try:
+        expander = st.expander(label, key="explanations_expander", on_change="rerun")
+    except TypeError:
+        return st.expander(label), True
+    return expander, bool(expander.open)
+
 # StudentInterface Class
 class StudentInterface:
-    def __init__(self, kb, explanation_system):
+    def __init__(self, kb, explanation_system, trace=None):
         self.kb = kb.df
+        self.index = kb.index
+        self.catalog = (kb.store.key, kb.snapshot.generation if kb.snapshot is not None else None)
         self.explanation_system = explanation_system
+        self.trace = trace or AdvisingTrace()
+        self.picker_results = int(os.environ.get("ADVISOR_PICKER_RESULTS", 200))
+
+    def picker_options(self, query, selected, exclude=()):
+        """Options for a course picker: the ``selected`` labels, then up to
+        ``picker_results`` search matches (by level) not in ``exclude``. Also
+        returns the number of matches."""
+        matches = self.index.search.matches(query, self.index.mask_of(exclude))
+        labels = self.index.search.labels
+        chosen = set(selected)
+        options = selected + [labels[cid] for cid in matches[:self.picker_results] if labels[cid] not in chosen]
+        return options, len(matches)
+
+    def course_picker(self, label, key, query, exclude=()):
+        code_of = self.index.search.code_of
+        excluded = set(exclude)
+        # Drop selections that left the catalog or became excluded (e.g. a failed course now passed).
+        selected = [option for option in st.session_state.get(key, [])
+                    if option in code_of and code_of[option] not in excluded]
+        st.session_state[key] = selected
+        options, found = self.picker_options(query, selected, exclude)
+        chosen = st.multiselect(label, options, key=key)
+        if found > self.picker_results:
+            st.caption(f"Showing {self.picker_results} of {found} matching courses; refine the search to see others.")
+        return [code_of[option] for option in chosen]
+
+    def render_plan(self, plan):
+        st.subheader("Your Path to Graduation")
+        terms = plan["terms"]
+        if terms:
+            rows = [[number, term["semester"], term["level"]] + course
+                    for number, term in enumerate(terms, 1) for course in term["courses"]]
+            st.dataframe(pd.DataFrame(rows, columns=["Term", "Semester", "Your Level", "Course Code",
+                                                     "Course Name", "Credit Hours", "Level"]),
+                         use_container_width=True, hide_index=True)
+            if plan["optimal"]:
+                st.caption(f"{len(terms)} semesters, the shortest possible path.")
+            else:
+                st.caption(f"{len(terms)} semesters, the best path found in the time available "
+                           f"(at least {plan['lower_bound']} are needed).")
+        elif plan["unplanned"]:
+            st.warning(f"No plan found for the remaining courses within the credit limit and the semesters "
+                       f"they are offered in: {', '.join(plan['unplanned'])}")
+        elif not plan["unreachable"]:
+            st.info("You have completed every course of your track.")
+        if plan["unreachable"]:
+            st.warning(f"These courses cannot be planned (prerequisites outside your track, a prerequisite or "
+                       f"co-requisite cycle, or co-requisites over your credit limit): "
+                       f"{', '.join(plan['unreachable'])}")
+        logger.info("Planned %d semesters (optimal=%s)", len(terms), plan["optimal"])
 
     def render(self):
         st.title("AIU CSE Course Registration Advising System")
-        st.markdown("### Welcome to the Course Advising System for the Big Data Analytics Track")
+        tracks = self.index.program_tracks
+        if len(tracks) == 1:
+            st.markdown(f"### Welcome to the Course Advising System for the {tracks[0]} Track")
+        else:
+            st.markdown("### Welcome to the Course Advising System")
         st.info("""
         This system helps you select courses for the upcoming semester based on your academic progress. 
         Please provide your details below to receive personalized recommendations.
         """)
 
-        # Move inputs to the sidebar
+        # Move inputs to the sidebar. The course pickers sit outside the form
+        # so that searching narrows their options straight away; large
+        # catalogs only send the matching courses to the browser.
         with st.sidebar:
+            st.markdown("#### Enter Your Academic Details")
+            if not self.kb.empty:
+                query = ""
+                if len(self.index.search.labels) > self.picker_results:
+                    query = st.text_input("Search Courses", key="course_query",
+                                          placeholder="Course code or name, e.g. AIE12 or machine learning")
+
+                # Passed Courses multiselect
+                passed_courses = self.course_picker("Passed Courses", "passed_courses", query)
+
+                # Failed Courses multiselect (exclude passed courses)
+                failed_courses = self.course_picker("Failed Courses", "failed_courses", query, exclude=passed_courses)
+            else:
+                passed_courses = []
+                failed_courses = []
+                st.warning("No courses available in the Knowledge Base. Please contact the admin to add courses.")
+
             with st.form("student_form"):
-                st.markdown("#### Enter Your Academic Details")
                 semester = st.selectbox("Current Semester", ["Fall", "Spring"])
+                track = default_track(self.index)
+                if len(tracks) > 1:
+                    track = st.selectbox("Your Track", tracks, index=tracks.index(track) if track in tracks else 0)
                 cgpa = st.number_input("CGPA (0.0–4.0)", min_value=0.0, max_value=4.0, step=0.1)
                 level = st.selectbox("Your Current Level", ["1", "2", "3", "4"])
-                
-                if not self.kb.empty:
-                    # Create formatted course options with only code and level
-                    course_options = [
-                        f"{row['CourseCode']} - Level {row['Level']}"
-                        for _, row in self.kb.iterrows()
-                    ]
-                    course_code_map = {
-                        f"{row['CourseCode']} - Level {row['Level']}": row['CourseCode']
-                        for _, row in self.kb.iterrows()
-                    }
-                    
-                    # Passed Courses multiselect
-                    selected_passed = st.multiselect("Passed Courses", course_options)
-                    passed_courses = [course_code_map[course] for course in selected_passed]
-                    
-                    # Failed Courses multiselect (exclude passed courses)
-                    available_failed_options = [
-                        course for course in course_options 
-                        if course_code_map[course] not in passed_courses
-                    ]
-                    selected_failed = st.multiselect("Failed Courses", available_failed_options)
-                    failed_courses = [course_code_map[course] for course in selected_failed]
-                else:
-                    passed_courses = []
-                    failed_courses = []
-                    st.warning("No courses available in the Knowledge Base. Please contact the admin to add courses.")
-
+                plan_path = st.checkbox("Also plan my path to graduation")
                 submit = st.form_submit_button("Get Recommendations")
 
-        # Main content for recommendations
-        if 'submit' in locals() and submit:
+        # Main content for recommendations. The submitted inputs stay on the
+        # page across reruns (searching, opening the explanations), and so do
+        # their results (``advice_result``), so that a rerun never runs the
+        # recommender again unless the catalog changed.
+        if submit:
+            st.session_state.advice_inputs = (semester, track, cgpa, level, passed_courses, failed_courses, plan_path)
+        if st.session_state.get("advice_inputs"):
+            semester, track, cgpa, level, passed_courses, failed_courses, plan_path = st.session_state.advice_inputs
             try:
                 if not 0.0 <= cgpa <= 4.0:
                     st.error("CGPA must be between 0.0 and 4.0!")
@@ -837,53 +3064,92 @@ class StudentInterface:
                     logger.error("Conflicting course selections")
                     return
 
-                if cgpa < 2.0:
-                    max_credits = 12
-                elif cgpa < 3.0:
-                    max_credits = 15
-                else:
-                    max_credits = 18
-
-                with st.spinner("Generating recommendations..."):
-                    time.sleep(1)
-                    engine = RecommendationEngine(semester, cgpa, passed_courses, failed_courses, 
-                                                self.kb, self.explanation_system, level)
-                    recommendations = engine.get_recommendations()
+                max_credits = credit_limit_for(cgpa)
 
-                if not recommendations:
-                    st.warning("No courses are available based on your inputs. Consider adjusting your CGPA, passed courses, or failed courses.")
-                    logger.warning("No recommendations generated")
+                cache = get_result_cache()
+                key = cache.key(self.catalog, recommender_backend(), semester, track, cgpa, level,
+                                passed_courses, failed_courses)
+                stored = st.session_state.get("advice_result")
+                reuse = not submit and stored is not None and stored[0] == key
+                cached = cache.get(key) if not reuse and self.catalog[1] is not None else None
+                if reuse:
+                    recommendations, explanations, errors = stored[1:]
+                    self.explanation_system.restore(explanations)
+                    for message in errors:
+                        st.error(message)
+                elif cached is not None:
+                    recommendations, explanations = cached
+                    self.explanation_system.restore(explanations)
+                    self.trace.cache_hit = True
+                    self.trace.recommendations = len(recommendations)
+                    st.session_state.advice_result = (key, recommendations, explanations, ())
                 else:
-                    st.subheader("Recommended Courses for Your Semester")
-                    rec_df = pd.DataFrame(recommendations, columns=["Course Code", "Course Name", "Credit Hours", "Level"])
-                    st.dataframe(
-                        rec_df.style
-                            .set_properties(**{
-                                'background-color': 'rgba(40, 40, 40, 0.8)',
-                                'color': 'white',
-                                'border-color': '#4CAF50'
-                            })
-                            .set_table_styles([{
-                                'selector': 'th',
-                                'props': [
-                                    ('background-color', '#2e3b3e'),
-                                    ('color', 'white'),
-                                    ('font-weight', 'bold'),
-                                    ('border-bottom', '2px solid #4CAF50')
-                                ]
-                            }]),
-                        use_container_width=True
-                    )
-                    recommended_credits = sum([row[2] for row in recommendations])
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.metric("Maximum Credit Hours", max_credits)
-                    with col2:
-                        st.metric("Recommended Credit Hours", recommended_credits)
-                    logger.info(f"Generated {len(recommendations)} recommendations, recommended credits: {recommended_credits}, max credits: {max_credits}")
+                    with st.spinner("Generating recommendations..."):
+                        time.sleep(1)
+                        engine = make_recommender(semester, cgpa, passed_courses, failed_courses, 
+                                                  self.kb, self.explanation_system, level, track=track,
+                                                  trace=self.trace)
+                        recommendations = engine.get_recommendations()
+                    for message in self.trace.errors:
+                        st.error(message)
+                    if self.catalog[1] is not None and not self.trace.errors:
+                        cache.put(key, recommendations, self.explanation_system.state())
+                    st.session_state.advice_result = (key, recommendations, self.explanation_system.state(),
+                                                      tuple(self.trace.errors))
 
-                    with st.expander("View Explanations"):
-                        self.explanation_system.display()
+                with self.trace.phase("render"):
+                    if not recommendations:
+                        st.warning("No courses are available based on your inputs. Consider adjusting your CGPA, passed courses, or failed courses.")
+                        logger.warning("No recommendations generated")
+                    else:
+                        st.subheader("Recommended Courses for Your Semester")
+                        rec_df = pd.DataFrame(recommendations, columns=["Course Code", "Course Name", "Credit Hours", "Level"])
+                        st.dataframe(
+                            rec_df.style
+                                .set_properties(**{
+                                    'background-color': 'rgba(40, 40, 40, 0.8)',
+                                    'color': 'white',
+                                    'border-color': '#4CAF50'
+                                })
+                                .set_table_styles([{
+                                    'selector': 'th',
+                                    'props': [
+                                        ('background-color', '#2e3b3e'),
+                                        ('color', 'white'),
+                                        ('font-weight', 'bold'),
+                                        ('border-bottom', '2px solid #4CAF50')
+                                    ]
+                                }]),
+                            use_container_width=True
+                        )
+                        recommended_credits = sum([row[2] for row in recommendations])
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            st.metric("Maximum Credit Hours", max_credits)
+                        with col2:
+                            st.metric("Recommended Credit Hours", recommended_credits)
+                        logger.info("Generated %d recommendations, recommended credits: %s, max credits: %s", len(recommendations), recommended_credits, max_credits)
+
+                        expander, is_open = explanations_expander("View Explanations")
+                        with expander:
+                            # Unavailable courses are only worked out once the expander is opened.
+                            self.explanation_system.display(include_unavailable=is_open)
+                if plan_path:
+                    # The plan depends on the same inputs as the recommendations
+                    # (the credit limit, not the exact CGPA), so it is kept
+                    # under the same key until they or the catalog change.
+                    stored = st.session_state.get("advice_plan")
+                    if stored is not None and stored[0] == key:
+                        plan = stored[1]
+                    else:
+                        with self.trace.phase("plan"):
+                            plan = GraduationPlanner(get_catalog_index(self.kb), cgpa, passed_courses,
+                                                     failed_courses, level, semester, track=track).plan()
+                        st.session_state.advice_plan = (key, plan)
+                    self.render_plan(plan)
+                if submit:
+                    get_advising_metrics().record(self.trace)
+                    self.trace.log()
 
                 # Add Report button at the bottom of the main content
                 st.markdown("### Report")
@@ -906,7 +3172,10 @@ class StudentInterface:
 
 # Main Function with Welcome Page
 def main():
-    logger.debug(f"Current working directory: {os.getcwd()}")
+    # Styles are emitted here rather than at import, so that batch and API
+    # workers importing this module do no Streamlit work.
+    apply_styles()
+    logger.debug("Current working directory: %s", os.getcwd())
     if "mode_selected" not in st.session_state:
         st.session_state.mode_selected = None
 
@@ -927,9 +3196,11 @@ def main():
 
     else:
         try:
-            kb = KnowledgeBase()
+            trace = AdvisingTrace()
+            with trace.phase("catalog_load"):
+                kb = KnowledgeBase()
             explanation_system = ExplanationSystem()
-            student_interface = StudentInterface(kb, explanation_system)
+            student_interface = StudentInterface(kb, explanation_system, trace)
 
             st.sidebar.header("Mode")
             mode = st.sidebar.selectbox("Select Mode", ["Student Mode", "Admin Mode"], 
@@ -943,6 +3214,8 @@ def main():
                 st.sidebar.markdown("### Admin Mode: Manage Knowledge Base")
                 password = st.sidebar.text_input("Enter Admin Password", type="password")
                 if password == "admin123":
+                    if st.sidebar.checkbox("Show engine diagnostics"):
+                        render_diagnostics_panel()
                     kb.editor()
                 else:
                     st.sidebar.error("Incorrect password! Please try again.")
@@ -0,0 +1,270 @@
+"""Local HTTP JSON API for course advising, without Streamlit.
+
+Endpoints:
+
+* ``POST /advise``: one student record (the fields ``batch_advise.py``
+  reads) and returns one result in its JSONL output format. Invalid records
+  get status 422 and an ``error``
+* ``POST /advise/batch``: a JSON list of records, returns a list of results
+* ``GET /health``: backend and catalog size
+* ``GET /stats``: request and batch counters of this worker
+
+Requests are served on an asyncio event loop. A batch holds every record
+that queued up while the previous batch ran, plus those arriving within
+``--batch-window`` milliseconds (at most ``--max-batch`` in total). Each
+batch is advised on a worker thread. Records are grouped by (semester,
+track); the prerequisite check of each group is one NumPy pass over the
+courses offered to it (``CatalogIndex.prereqs_met_many``). The catalog
+is loaded once per worker process and re-read only when it changes. With
+``--workers N``, N processes share the port (SO_REUSEPORT).
+
+    python advising_api.py --port 8600 --workers 4
+    curl -d '{"semester": "Fall", "cgpa": 3.1, "level": "2", "passed": ["CSE014"]}' localhost:8600/advise
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+import batch_advise
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity"}
+
+
+class AdvisingService:
+    """Micro-batches advising requests for one worker process."""
+    def __init__(self, catalog="courses.csv", backend="native", track=None,
+                 batch_window=0.001, max_batch=64):
+        self.catalog = catalog
+        self.backend = backend
+        self.track = track
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.kb = ProjKbs.KnowledgeBase(catalog)
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self._queue = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="advise")
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        return asyncio.get_running_loop().create_task(self._batcher())
+
+    async def advise(self, records):
+        loop = asyncio.get_running_loop()
+        futures = []
+        for record in records:
+            future = loop.create_future()
+            self._queue.put_nowait((record, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = await loop.run_in_executor(self._executor, self.advise_batch,
+                                                     [record for record, _ in batch])
+            except Exception as e:
+                logger.error(f"Error advising a batch of {len(batch)}: {str(e)}")
+                results = [{"error": str(e)}] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def advise_batch(self, records):
+        """Advise ``records`` together; runs on the service's worker thread."""
+        self.kb = kb = ProjKbs.KnowledgeBase(self.catalog)
+        index = kb.index
+        track = self.track or ProjKbs.default_track(index)
+        parsed = [batch_advise.parse_record(record, track, index.program_tracks) for record in records]
+        shards = collections.defaultdict(list)
+        for result, student in parsed:
+            if student is not None:
+                shards[(result["semester"], result["track"])].append((result, student))
+        vectorized = ProjKbs.uses_prereqs_met(self.backend)
+        for (semester, track), students in shards.items():
+            met = [None] * len(students)
+            if vectorized:
+                met = index.prereqs_met_many([index.mask_of(student["passed"]) for _, student in students],
+                                             rows=index.offered_rows(semester, track))
+            for row, (result, student) in enumerate(students):
+                batch_advise.recommend(result, student, kb.df, index, self.backend, prereqs_met=met[row])
+        self.requests += len(records)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(records))
+        return [result for result, _ in parsed]
+
+    def stats(self):
+        return {
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+
+class AdvisingServer:
+    """Minimal HTTP/1.1 (keep-alive, Content-Length bodies) over asyncio streams."""
+    def __init__(self, service):
+        self.service = service
+
+    async def route(self, method, path, body):
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path in ("/health", "/stats"):
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            if path == "/stats":
+                return 200, self.service.stats()
+            return 200, {"status": "ok", "backend": self.service.backend, "courses": len(self.service.kb.df)}
+        if path not in ("/advise", "/advise/batch"):
+            return 404, {"error": f"No such endpoint: {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError as e:
+            return 400, {"error": f"Invalid JSON: {str(e)}"}
+        if path == "/advise":
+            if not isinstance(payload, dict):
+                return 400, {"error": "Expected a JSON object"}
+            result = (await self.service.advise([payload]))[0]
+            return (422 if result["error"] else 200), result
+        if not isinstance(payload, list) or not all(isinstance(record, dict) for record in payload):
+            return 400, {"error": "Expected a JSON list of objects"}
+        return 200, await self.service.advise(payload)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": f"Body larger than {MAX_BODY} bytes"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.route(method.upper(), path, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+
+async def serve(host, port, service, reuse_port=False):
+    batcher = service.start()
+    server = await asyncio.start_server(AdvisingServer(service).handle, host, port, reuse_port=reuse_port or None)
+    logger.warning(f"Advising API (pid {os.getpid()}, backend {service.backend}, {len(service.kb.df)} courses) "
+                   f"listening on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher.cancel()
+
+
+def run_worker(args, reuse_port):
+    service = AdvisingService(args.catalog, args.backend, args.track, args.batch_window / 1000, args.max_batch)
+    try:
+        asyncio.run(serve(args.host, args.port, service, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=1, help="server processes sharing the port")
+    parser.add_argument("--catalog", default="courses.csv")
+    parser.add_argument("--backend", choices=sorted(ProjKbs.RECOMMENDERS), default="native")
+    parser.add_argument("--track", help="track for records without one (default: ADVISOR_DEFAULT_TRACK or "
+                                        "the catalog's first track)")
+    parser.add_argument("--batch-window", type=float, default=1.0, help="milliseconds to collect a batch")
+    parser.add_argument("--max-batch", type=int, default=64, help="records advised together at most")
+    args = parser.parse_args(argv)
+
+    logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.StreamHandler(sys.stderr))
+    if args.workers <= 1:
+        run_worker(args, reuse_port=False)
+        return 0
+    if not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("--workers needs SO_REUSEPORT, which this platform lacks")
+    workers = [multiprocessing.Process(target=run_worker, args=(args, True), daemon=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    # Stop the workers too when this process is terminated.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while all(worker.is_alive() for worker in workers):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
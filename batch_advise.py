@@ -0,0 +1,257 @@
+"""Headless batch advising for a whole cohort.
+
+Reads student records from CSV or JSONL as a stream, computes
+recommendations in a process pool (the catalog is loaded once per worker)
+and streams the results to JSONL or CSV in input order. At most
+``--workers * --window`` batches are in flight, so memory stays bounded
+however large the input is.
+
+Input fields: ``student_id`` (optional), ``semester``, ``cgpa``, ``level``,
+``passed``, ``failed`` and optionally ``track``. In CSV, ``passed`` and
+``failed`` are course codes separated by commas or semicolons; in JSONL
+they may also be lists.
+
+    python batch_advise.py students.csv recommendations.jsonl --workers 8
+"""
+import argparse
+import collections
+import concurrent.futures
+import csv
+import json
+import os
+import sys
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+
+CSV_FIELDS = ["student_id", "semester", "cgpa", "level", "track", "credit_limit",
+              "total_credits", "recommended", "error"]
+
+_worker = {}
+
+
+def read_records(path):
+    """Yield student records one at a time from a CSV or JSONL file ("-" is stdin)."""
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if path.endswith(".jsonl") or path.endswith(".json") or path == "-":
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(stream)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _codes(value, field):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [c.strip() for c in value.replace(";", ",").split(",") if c.strip()]
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f"{field} must be a list or a comma-separated string")
+    if not all(isinstance(c, str) for c in value):
+        raise ValueError(f"{field} must be a list of course codes")
+    return [c.strip() for c in value if c.strip()]
+
+
+def _init_worker(catalog, backend, default_track):
+    kb = ProjKbs.KnowledgeBase(catalog)
+    _worker["df"] = kb.df
+    _worker["index"] = kb.index
+    _worker["backend"] = backend
+    _worker["track"] = default_track or ProjKbs.default_track(kb.index)
+    _worker["tracks"] = kb.index.program_tracks
+
+
+def _cgpa(value):
+    if value is None or str(value).strip() == "":
+        raise ValueError("Missing field: cgpa")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cgpa: {value!r} (expected a number between 0.0 and 4.0)") from None
+
+
+def parse_record(record, default_track, tracks=()):
+    """Normalize and validate one student record.
+
+    ``tracks`` are the catalog's tracks; a record naming any other track
+    (except ``default_track``) is invalid. Returns the result skeleton and
+    the parsed student; the student is None (and the skeleton carries
+    ``error``) when the record is invalid.
+    """
+    result = {
+        "student_id": record.get("student_id", ""),
+        "semester": str(record.get("semester", "")).strip().title(),
+        "cgpa": record.get("cgpa"),
+        "level": str(record.get("level", "")).strip(),
+        "track": str(record.get("track") or "").strip() or default_track,
+    }
+    try:
+        cgpa = _cgpa(result["cgpa"])
+        passed = _codes(record.get("passed"), "passed")
+        failed = _codes(record.get("failed"), "failed")
+        if result["semester"] not in ("Fall", "Spring"):
+            raise ValueError(f"Invalid semester: {result['semester']!r}")
+        if not 0.0 <= cgpa <= 4.0:
+            raise ValueError("CGPA must be between 0.0 and 4.0!")
+        if result["level"] not in ("1", "2", "3", "4"):
+            raise ValueError(f"Invalid level: {result['level']!r}")
+        if result["track"] != default_track and result["track"] not in tracks:
+            valid = sorted(set(tracks) | {default_track})
+            raise ValueError(f"Unknown track: {result['track']!r}; expected one of {', '.join(valid)}")
+        if set(passed) & set(failed):
+            raise ValueError("A course cannot be both passed and failed!")
+    except Exception as e:
+        result["error"] = str(e)
+        return result, None
+    return result, {"cgpa": cgpa, "passed": passed, "failed": failed}
+
+
+def recommend(result, student, df, index, backend, prereqs_met=None):
+    """Fill ``result`` with recommendations for a student from ``parse_record()``."""
+    try:
+        explanation_system = ProjKbs.ExplanationSystem()
+        trace = ProjKbs.AdvisingTrace(backend)
+        engine = ProjKbs.make_recommender(result["semester"], student["cgpa"], student["passed"],
+                                          student["failed"], df, explanation_system, result["level"],
+                                          track=result["track"], backend=backend, index=index, trace=trace,
+                                          prereqs_met=prereqs_met)
+        recommendations = engine.get_recommendations()
+        if trace.errors:
+            raise RuntimeError("; ".join(trace.errors))
+        result.update({
+            "cgpa": student["cgpa"],
+            "credit_limit": ProjKbs.credit_limit_for(student["cgpa"]),
+            "total_credits": sum(int(r[2]) for r in recommendations),
+            "recommended": [r[0] for r in recommendations],
+            "courses": [{"code": r[0], "name": r[1].strip(), "credits": int(r[2]), "level": str(r[3])}
+                        for r in recommendations],
+            "explanations": list(explanation_system.explanations),
+            "error": "",
+        })
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def advise(record):
+    result, student = parse_record(record, _worker["track"], _worker["tracks"])
+    if student is None:
+        return result
+    return recommend(result, student, _worker["df"], _worker["index"], _worker["backend"])
+
+
+def advise_batch(records):
+    return [advise(record) for record in records]
+
+
+def batched(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ResultWriter:
+    def __init__(self, path, explanations=True):
+        self.path = path
+        self.explanations = explanations
+        self.stream = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+        self.csv = None
+        if path.endswith(".csv"):
+            self.csv = csv.DictWriter(self.stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, result):
+        if self.csv is not None:
+            row = dict(result)
+            row["recommended"] = ",".join(result.get("recommended", []))
+            self.csv.writerow(row)
+        else:
+            if not self.explanations:
+                result = {k: v for k, v in result.items() if k != "explanations"}
+            self.stream.write(json.dumps(result) + "\n")
+
+    def close(self):
+        if self.stream is sys.stdout:
+            self.stream.flush()
+        else:
+            self.stream.close()
+
+
+def run(input_path, output_path, catalog="courses.csv", workers=None, batch_size=64, window=4,
+        backend="native", track=None, explanations=True, progress_every=2.0):
+    workers = workers or os.cpu_count() or 1
+    writer = ResultWriter(output_path, explanations=explanations)
+    processed = errors = 0
+    started = last_report = time.perf_counter()
+    in_flight = collections.deque()
+    batches = batched(read_records(input_path), batch_size)
+
+    def drain(future):
+        nonlocal processed, errors, last_report
+        for result in future.result():
+            writer.write(result)
+            processed += 1
+            errors += bool(result["error"])
+        now = time.perf_counter()
+        if progress_every and now - last_report >= progress_every:
+            last_report = now
+            print(f"... {processed} students, {processed / (now - started):.1f} students/sec",
+                  file=sys.stderr, flush=True)
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                    initargs=(catalog, backend, track)) as pool:
+            for batch in batches:
+                in_flight.append(pool.submit(advise_batch, batch))
+                if len(in_flight) >= workers * window:
+                    drain(in_flight.popleft())
+            while in_flight:
+                drain(in_flight.popleft())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed else 0.0
+    print(f"Advised {processed} students ({errors} errors) in {elapsed:.2f}s "
+          f"with {workers} workers: {rate:.1f} students/sec", file=sys.stderr)
+    return {"students": processed, "errors": errors, "seconds": elapsed, "students_per_sec": rate}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="student records (.csv or .jsonl, '-' for JSONL on stdin)")
+    parser.add_argument("output", help="results (.csv or .jsonl, '-' for JSONL on stdout)")
+    parser.add_argument("--catalog", default="courses.csv")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64, help="students per task sent to a worker")
+    parser.add_argument("--window", type=int, default=4, help="batches in flight per worker")
+    parser.add_argument("--backend", choices=sorted(ProjKbs.RECOMMENDERS), default="native")
+    parser.add_argument("--track", help="track for records without one (default: ADVISOR_DEFAULT_TRACK or "
+                                        "the catalog's first track)")
+    parser.add_argument("--no-explanations", action="store_true", help="omit explanations from JSONL output")
+    parser.add_argument("--progress-every", type=float, default=2.0, help="seconds between progress lines (0 = off)")
+    args = parser.parse_args(argv)
+
+    summary = run(args.input, args.output, catalog=args.catalog, workers=args.workers,
+                  batch_size=args.batch_size, window=args.window, backend=args.backend,
+                  track=args.track, explanations=not args.no_explanations,
+                  progress_every=args.progress_every)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
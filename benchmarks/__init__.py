@@ -0,0 +1,2 @@
+"""Performance benchmarks; run each module with ``python -m benchmarks.<name>``
+from the repository root."""
@@ -0,0 +1,151 @@
+"""Load test for the advising API (advising_api.py).
+
+Starts a local server (unless ``--url`` points at a running one) and sends
+``--requests`` synthetic students to ``POST /advise`` over ``--concurrency``
+keep-alive connections. Prints throughput, latency percentiles and the
+server's batch statistics as JSON.
+
+    python -m benchmarks.api_load --requests 5000 --concurrency 64 --workers 2
+    python -m benchmarks.api_load --url 127.0.0.1:8600 --batch-window 0
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+from benchmarks.synthetic import generate_students
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def wait_for_server(host, port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            status, health = await request(reader, writer, "GET", "/health")
+            writer.close()
+            return health
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def load(host, port, students, concurrency):
+    queue = list(reversed(students))
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while queue:
+                student = queue.pop()
+                started = time.perf_counter()
+                status, _ = await request(reader, writer, "POST", "/advise", student)
+                latencies.append(time.perf_counter() - started)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+async def collect_stats(host, port, connections):
+    # One request per connection so that each worker sharing the port is likely to answer.
+    stats = {}
+    for _ in range(connections):
+        reader, writer = await asyncio.open_connection(host, port)
+        _, worker = await request(reader, writer, "GET", "/stats")
+        writer.close()
+        stats[worker["pid"]] = worker
+    return list(stats.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="host:port of a running server (default: start one)")
+    parser.add_argument("--port", type=int, default=8611, help="port for the server this starts")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--backend", default="native")
+    parser.add_argument("--batch-window", type=float, default=1.0)
+    parser.add_argument("--catalog", default="courses.csv")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = ProjKbs.KnowledgeBase(args.catalog).df
+    students = list(generate_students(df, args.requests, seed=args.seed))
+    for student in students:
+        del student["track"]
+
+    server = None
+    if args.url:
+        host, port = args.url.rsplit(":", 1)
+        port = int(port)
+    else:
+        host, port = "127.0.0.1", args.port
+        server = subprocess.Popen([sys.executable, "advising_api.py", "--port", str(port),
+                                   "--workers", str(args.workers), "--backend", args.backend,
+                                   "--catalog", args.catalog, "--batch-window", str(args.batch_window)],
+                                  stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_for_server(host, port))
+        elapsed, latencies, errors = asyncio.run(load(host, port, students, args.concurrency))
+        workers = asyncio.run(collect_stats(host, port, 4 * args.workers))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    ms = [latency * 1000 for latency in latencies]
+    print(json.dumps({
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": args.concurrency,
+        "seconds": elapsed,
+        "requests_per_sec": len(latencies) / elapsed,
+        "latency_ms": {
+            "p50": statistics.median(ms),
+            "p95": ms[int(0.95 * (len(ms) - 1))],
+            "p99": ms[int(0.99 * (len(ms) - 1))],
+        },
+        "workers": workers,
+    }, indent=2))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Concurrent-session load test for the Streamlit app (ProjKbs.py).
+
+Runs the real script with Streamlit's ``AppTest``, with no server or
+browser. Each simulated student is a separate ``AppTest``, so it has its own
+session state. ``AppTest`` is not thread-safe, so concurrent sessions run in
+separate worker processes; the sessions of one worker run one after another
+and share that process's caches, like the sessions of one server. Every
+session goes through these steps, each of which is one script run:
+
+* ``open``: the welcome page
+* ``student_mode``: click "Student Mode"
+* ``search``: type a course code in the picker search box (only shown for
+  catalogs larger than ``ADVISOR_PICKER_RESULTS``)
+* ``pick_courses``: select the passed and failed courses
+* ``submit``: fill in the form and click "Get Recommendations"
+* ``explanations``: open "View Explanations"
+
+``--concurrency`` worker processes take sessions from a shared queue until
+``--sessions`` have finished. Profiles are random synthetic students (see
+``benchmarks.synthetic``). Each worker runs one warm-up session first.
+Finished sessions are kept alive, as a server keeps them until the browser
+disconnects. A worker's growth in resident memory (``/proc/self/statm``)
+since its warm-up, divided by the sessions it ran, therefore approximates
+the memory each session holds. Prints per-step latency percentiles,
+throughput and the RSS of every worker as JSON.
+
+    python -m benchmarks.app_load --sessions 200 --concurrency 16
+    python -m benchmarks.app_load --courses 5000 --sessions 100 --concurrency 8
+
+Note that each cache miss includes the one-second spinner of the Student
+Mode page.
+"""
+import argparse
+import concurrent.futures
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+from streamlit.testing.v1 import AppTest
+
+import ProjKbs
+from benchmarks.synthetic import generate_catalog, generate_students
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ProjKbs.py")
+STEPS = ["open", "student_mode", "search", "pick_courses", "submit", "explanations"]
+
+# State of a worker process; see _init_worker().
+_worker = {}
+
+
+def rss_bytes():
+    """Resident set size of this process, or None off Linux."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    return None
+
+
+class Session:
+    """One simulated student going through Student Mode."""
+    def __init__(self, profile, labels, timeout):
+        self.profile = profile
+        self.labels = labels
+        self.app = AppTest.from_file(APP, default_timeout=timeout)
+        self.timings = {}
+        self.error = None
+
+    def step(self, name, action):
+        started = time.perf_counter()
+        action()
+        self.timings[name] = time.perf_counter() - started
+        if self.app.exception:
+            raise RuntimeError(f"{name}: {self.app.exception[0].value}")
+
+    def run(self):
+        app, profile = self.app, self.profile
+        try:
+            self.step("open", app.run)
+            self.step("student_mode", widget(app.button, "Student Mode").click().run)
+            search = widget(app.sidebar.text_input, "Search Courses")
+            if search is not None and profile["passed"]:
+                self.step("search", search.set_value(profile["passed"][0][:3]).run)
+
+            def pick_courses():
+                app.session_state["passed_courses"] = [self.labels[code] for code in profile["passed"]]
+                app.session_state["failed_courses"] = [self.labels[code] for code in profile["failed"]]
+                app.run()
+
+            self.step("pick_courses", pick_courses)
+            widget(app.sidebar.selectbox, "Current Semester").set_value(profile["semester"])
+            track = widget(app.sidebar.selectbox, "Your Track")
+            if track is not None and profile["track"] in track.options:
+                track.set_value(profile["track"])
+            widget(app.sidebar.number_input, "CGPA (0.0–4.0)").set_value(profile["cgpa"])
+            widget(app.sidebar.selectbox, "Your Current Level").set_value(profile["level"])
+            self.step("submit", widget(app.sidebar.button, "Get Recommendations").click().run)
+            errors = [element.value for element in app.error if element.value.startswith("Error")]
+            if errors:
+                raise RuntimeError(f"submit: {errors[0]}")
+            if app.expander:
+                def explanations():
+                    app.session_state["explanations_expander"] = True
+                    app.run()
+
+                self.step("explanations", explanations)
+        except Exception as e:
+            self.error = str(e)
+        return self
+
+
+def _init_worker(labels, timeout, warmup):
+    _worker.update(labels=labels, timeout=timeout, sessions=[])
+    started = time.perf_counter()
+    _worker["warmup_error"] = Session(warmup, labels, timeout).run().error
+    _worker["warmup_seconds"] = time.perf_counter() - started
+    gc.collect()
+    _worker["rss_base"] = rss_bytes()
+
+
+def _run_session(profile):
+    """Run one session in this worker and keep it alive. Returns its
+    timings and error, plus this worker's memory so far."""
+    if _worker["warmup_error"]:
+        return {"pid": os.getpid(), "timings": {}, "error": f"warm-up: {_worker['warmup_error']}"}
+    started = time.time()
+    session = Session(profile, _worker["labels"], _worker["timeout"]).run()
+    ended = time.time()
+    _worker["sessions"].append(session)
+    gc.collect()
+    return {
+        "pid": os.getpid(),
+        "timings": session.timings,
+        "error": session.error,
+        "started": started,
+        "ended": ended,
+        "sessions": len(_worker["sessions"]),
+        "warmup_seconds": _worker["warmup_seconds"],
+        "rss_base": _worker["rss_base"],
+        "rss": rss_bytes(),
+    }
+
+
+def profiles(df, index, count, seed):
+    """Random students; passed/failed lists are capped so that each picker
+    holds a realistic number of courses."""
+    rng = random.Random(seed)
+    tracks = index.program_tracks or [ProjKbs.COMMON_TRACK]
+    for profile in generate_students(df, count, seed=seed):
+        profile["passed"] = profile["passed"][:60]
+        profile["track"] = rng.choice(tracks)
+        yield profile
+
+
+def summarize(samples):
+    ms = sorted(sample * 1000 for sample in samples)
+    if not ms:
+        return None
+    return {
+        "count": len(ms),
+        "p50": statistics.median(ms),
+        "p95": ms[int(0.95 * (len(ms) - 1))],
+        "p99": ms[int(0.99 * (len(ms) - 1))],
+        "max": ms[-1],
+    }
+
+
+def load(args):
+    kb = ProjKbs.KnowledgeBase()
+    if kb.df.empty:
+        raise SystemExit(f"No courses in {os.path.abspath('courses.csv')}")
+    index = kb.index
+    labels = dict(zip(index.search.code_of.values(), index.search.code_of.keys()))
+    students = list(profiles(kb.df, index, args.sessions + 1, args.seed))
+    warmup = students.pop()
+
+    # Fresh interpreters: forking would copy this process's Streamlit state.
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.concurrency, mp_context=context,
+                                                initializer=_init_worker,
+                                                initargs=(labels, args.timeout, warmup)) as pool:
+        finished = list(pool.map(_run_session, students))
+    # From the first to the last session, leaving out worker start-up and warm-up.
+    ran = [session for session in finished if "started" in session]
+    elapsed = max(session["ended"] for session in ran) - min(session["started"] for session in ran) if ran else 0.0
+
+    failed = [session for session in finished if session["error"]]
+    workers = {}
+    for session in finished:
+        if "rss" in session and session["sessions"] >= workers.get(session["pid"], {}).get("sessions", 0):
+            workers[session["pid"]] = session
+    processes = [{
+        "pid": pid,
+        "sessions": worker["sessions"],
+        "warmup_seconds": worker["warmup_seconds"],
+        "rss_after_warmup_mib": worker["rss_base"] / 2 ** 20 if worker["rss_base"] is not None else None,
+        "rss_mib": worker["rss"] / 2 ** 20 if worker["rss"] is not None else None,
+        "rss_per_session_kib": (worker["rss"] - worker["rss_base"]) / 1024 / worker["sessions"]
+        if worker["rss_base"] is not None and worker["rss"] is not None else None,
+    } for pid, worker in sorted(workers.items())]
+    measured = [worker for worker in workers.values() if worker["rss_base"] is not None and worker["rss"] is not None]
+    return {
+        "courses": len(kb.df),
+        "sessions": len(finished),
+        "errors": len(failed),
+        "concurrency": args.concurrency,
+        "seconds": elapsed,
+        "sessions_per_sec": len(ran) / elapsed if elapsed else None,
+        "submits_per_sec": sum("submit" in session["timings"] for session in ran) / elapsed if elapsed else None,
+        "steps_ms": {step: summarize([session["timings"][step] for session in finished if step in session["timings"]])
+                     for step in STEPS},
+        "rss_per_session_kib": sum(worker["rss"] - worker["rss_base"] for worker in measured) / 1024
+        / sum(worker["sessions"] for worker in measured) if measured else None,
+        "peak_worker_rss_mib": max(worker["rss"] for worker in measured) / 2 ** 20 if measured else None,
+        "processes": processes,
+        "first_errors": [session["error"] for session in failed[:5]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100, help="simulated students")
+    parser.add_argument("--concurrency", type=int, default=8, help="sessions running at the same time")
+    parser.add_argument("--catalog-dir", default=".", help="directory holding courses.csv (the app's working directory)")
+    parser.add_argument("--courses", type=int, default=0,
+                        help="serve a synthetic catalog of this many courses instead of --catalog-dir")
+    parser.add_argument("--tracks", type=int, default=3, help="tracks of the synthetic catalog")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds a single script run may take")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.courses:
+            generate_catalog(args.courses, tracks=args.tracks, seed=args.seed).to_csv(
+                os.path.join(workdir, "courses.csv"), index=False)
+        cwd = os.getcwd()
+        os.chdir(workdir if args.courses else args.catalog_dir)
+        try:
+            result = load(args)
+        finally:
+            os.chdir(cwd)
+    print(json.dumps(result, indent=2))
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    # AppTest runs the app as __main__ in the workers, so the pool must find
+    # _init_worker() and _run_session() under this module's import name.
+    from benchmarks import app_load
+
+    sys.exit(app_load.main())
@@ -0,0 +1,82 @@
+"""How an Experta engine run grows with the catalog size.
+
+For each synthetic catalog size this times ``get_recommendations()`` on a
+pooled engine template (the engine is checked out and the student's facts
+are declared outside the timed part). It reports the median over
+``--students`` synthetic students, the median number of Course facts and
+state updates per run, and the time per 1000 declared courses.
+
+``growth_exponent`` is the slope of log(run time) over log(catalog size)
+between consecutive sizes: about 1 means the run grows linearly with the
+catalog, about 2 quadratically.
+
+    python -m benchmarks.engine_scaling --sizes 500,1000,2000,4000,8000
+"""
+import argparse
+import json
+import logging
+import math
+import statistics
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+from benchmarks.synthetic import generate_catalog, generate_students
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+
+def run_once(df, index, student):
+    pool = ProjKbs.get_engine_pool()
+    engine = pool.acquire(df, index, student["semester"], student["track"])
+    trace = ProjKbs.AdvisingTrace("experta")
+    engine.set_trace(trace)
+    engine.prepare(student["cgpa"], student["passed"], student["failed"], ProjKbs.ExplanationSystem(),
+                   student["level"])
+    started = time.perf_counter()
+    engine.get_recommendations()
+    elapsed = time.perf_counter() - started
+    engine.clear_student()
+    pool.release(engine)
+    return elapsed, trace.state_modifications
+
+
+def measure(size, args):
+    df = generate_catalog(size, depth=args.depth, fan_out=args.fan_out, tracks=args.tracks, seed=args.seed)
+    index = ProjKbs.CatalogIndex(df)
+    students = list(generate_students(df, args.students, seed=args.seed, tracks=args.tracks))
+    declared = [len(index.offered_rows(s["semester"], s["track"])) for s in students]
+    run_once(df, index, students[0])  # warm-up (builds the templates)
+    samples = [run_once(df, index, student) for student in students]
+    run_ms = statistics.median(elapsed for elapsed, _ in samples) * 1000
+    return {
+        "courses": size,
+        "run_ms_median": run_ms,
+        "courses_declared_median": statistics.median(declared),
+        "state_modifications_median": statistics.median(modifications for _, modifications in samples),
+        "ms_per_1000_declared": run_ms * 1000 / max(1, statistics.median(declared)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="500,1000,2000,4000,8000", help="comma-separated catalog sizes")
+    parser.add_argument("--students", type=int, default=20, help="synthetic students per size")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--fan-out", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = [measure(int(size), args) for size in args.sizes.split(",")]
+    for before, after in zip(results, results[1:]):
+        after["growth_exponent"] = (math.log(after["run_ms_median"] / before["run_ms_median"])
+                                    / math.log(after["courses"] / before["courses"]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Per-request setup cost: a fresh RecommendationEngine vs a pooled template.
+
+"Setup" is everything before ``run()``: building the engine and declaring
+facts (fresh), or checking out a template and declaring the student's
+facts (pooled). "Total" adds running the rules and returning the engine.
+
+    python -m benchmarks.engine_setup --requests 200
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+PROFILE = {
+    "semester": "Spring",
+    "cgpa": 3.5,
+    "passed": ["CSE014", "CSE015", "MAT111", "MAT131"],
+    "failed": ["CSE315"],
+    "level": "3",
+    "track": "Big Data Analytics",
+}
+
+
+def fresh(df, index, p):
+    started = time.perf_counter()
+    engine = ProjKbs.RecommendationEngine(p["semester"], p["cgpa"], p["passed"], p["failed"], df,
+                                          ProjKbs.ExplanationSystem(), p["level"], track=p["track"], index=index)
+    setup = time.perf_counter() - started
+    engine.get_recommendations()
+    return setup, time.perf_counter() - started
+
+
+def pooled(df, index, p):
+    pool = ProjKbs.get_engine_pool()
+    started = time.perf_counter()
+    engine = pool.acquire(df, index, p["semester"], p["track"])
+    engine.prepare(p["cgpa"], p["passed"], p["failed"], ProjKbs.ExplanationSystem(), p["level"])
+    setup = time.perf_counter() - started
+    engine.get_recommendations()
+    engine.clear_student()
+    pool.release(engine)
+    return setup, time.perf_counter() - started
+
+
+def measure(fn, df, index, requests):
+    fn(df, index, PROFILE)  # warm-up (builds the template for the pooled path)
+    samples = [fn(df, index, PROFILE) for _ in range(requests)]
+    return {
+        "setup_ms_median": statistics.median(s for s, _ in samples) * 1000,
+        "total_ms_median": statistics.median(t for _, t in samples) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", default="courses.csv")
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    kb = ProjKbs.KnowledgeBase(args.catalog)
+    results = {name: measure(fn, kb.df, kb.index, args.requests)
+               for name, fn in (("fresh", fresh), ("pooled", pooled))}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Memory held by the in-memory catalog representations.
+
+For each synthetic catalog size this reports, in KiB:
+
+* ``dataframe``: the catalog DataFrame (``memory_usage(deep=True)``)
+* ``catalog_index``: the compiled ``CatalogIndex``
+* ``course_search``: the Student Mode picker options and search index
+* ``experta_template``: one pooled Experta engine holding the Course facts
+  of one (semester, track), for catalogs up to ``--experta-max`` courses
+
+Allocations are measured with ``tracemalloc``, so this covers Python objects
+and NumPy buffers but not memory the allocator keeps around afterwards.
+
+    python -m benchmarks.memory --sizes 5000,100000 --tracks 6
+"""
+import argparse
+import gc
+import json
+import logging
+import tracemalloc
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+from benchmarks.synthetic import generate_catalog, track_names
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+
+def allocated(build):
+    """Bytes still allocated by ``build()`` once it returns, and its result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+def measure(size, args):
+    df = generate_catalog(size, depth=args.depth, fan_out=args.fan_out, tracks=args.tracks, seed=args.seed)
+    result = {"courses": size, "dataframe_kib": int(df.memory_usage(deep=True).sum()) // 1024}
+    used, index = allocated(lambda: ProjKbs.CatalogIndex(df))
+    result["catalog_index_kib"] = used // 1024
+    used, _ = allocated(lambda: ProjKbs.CourseSearch(index))
+    result["course_search_kib"] = used // 1024
+    if size <= args.experta_max:
+        track = track_names(args.tracks)[0]
+        engine_class = ProjKbs.RecommendationEngine  # imports Experta outside the measurement
+        used, engine = allocated(lambda: engine_class.template(df, index, "Fall", track))
+        result["experta_template_kib"] = used // 1024
+        result["experta_course_facts"] = len(engine.facts) - 1
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--fan-out", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=6)
+    parser.add_argument("--experta-max", type=int, default=20000, help="largest catalog to build an Experta template for")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(json.dumps([measure(int(size), args) for size in args.sizes.split(",")], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Greedy (rule-firing order) vs knapsack course selection.
+
+For synthetic students on synthetic catalogs this compares the ``native``
+recommender (same selection as the Experta rules) with ``optimal``
+(OptimalRecommender): time per request, share of the credit limit used
+and the total unlock depth of the selected courses.
+
+    python -m benchmarks.optimizer --sizes 500,5000 --students 200
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+from benchmarks.synthetic import generate_catalog, generate_students
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+BACKENDS = ("native", "optimal")
+
+
+def run(backend, df, index, student):
+    engine = ProjKbs.make_recommender(student["semester"], student["cgpa"], student["passed"], student["failed"],
+                                      df, ProjKbs.ExplanationSystem(), student["level"], track=student["track"],
+                                      backend=backend, index=index)
+    started = time.perf_counter()
+    recommendations = engine.get_recommendations()
+    return recommendations, time.perf_counter() - started
+
+
+def bench_size(size, args):
+    df = generate_catalog(size, depth=args.depth, fan_out=args.fan_out, tracks=args.tracks,
+                          coreq_rate=args.coreq_rate, seed=args.seed)
+    index = ProjKbs.get_catalog_index(df)
+    height = index.graph.height
+    stats = {backend: {"ms": [], "credit_use": [], "unlock_depth": []} for backend in BACKENDS}
+    improved = 0
+    for student in generate_students(df, args.students, seed=args.seed, tracks=args.tracks):
+        limit = ProjKbs.credit_limit_for(student["cgpa"])
+        depths = {}
+        for backend in BACKENDS:
+            recommendations, elapsed = run(backend, df, index, student)
+            stats[backend]["ms"].append(elapsed * 1000)
+            stats[backend]["credit_use"].append(sum(int(r[2]) for r in recommendations) / limit)
+            depths[backend] = sum(int(height[index.ids[r[0]]]) for r in recommendations)
+            stats[backend]["unlock_depth"].append(depths[backend])
+        improved += depths["optimal"] > depths["native"]
+    result = {"courses": size, "students": args.students, "optimal_deeper_share": improved / args.students}
+    for backend, values in stats.items():
+        result[backend] = {
+            "median_ms": statistics.median(values["ms"]),
+            "p95_ms": sorted(values["ms"])[int(0.95 * (len(values["ms"]) - 1))],
+            "mean_credit_use": statistics.mean(values["credit_use"]),
+            "mean_unlock_depth": statistics.mean(values["unlock_depth"]),
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="500,5000", help="comma-separated catalog sizes")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--fan-out", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=3)
+    parser.add_argument("--coreq-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = [bench_size(int(size), args) for size in args.sizes.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
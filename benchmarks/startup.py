@@ -0,0 +1,103 @@
+"""Cold-start cost of the app: import time and time to first render.
+
+Each sample runs in a fresh interpreter (``--runs`` of each kind):
+
+* ``import``: ``import ProjKbs`` as batch and API workers do, after
+  ``import streamlit`` (which a Streamlit server has already loaded)
+* ``render``: the app script run with Streamlit's ``AppTest``, as a new
+  server process serves its first session. ``first_render`` is the welcome
+  page, ``student_mode`` the next run (loads the catalog and the data stack),
+  ``submit`` the first recommendation (loads the rule engine for the
+  ``experta`` backends)
+
+For each step it reports the median seconds and which heavy modules (pandas,
+NumPy, Experta) were loaded once the step finished.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("pandas", "numpy", "experta")
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ProjKbs.py")
+
+
+def loaded():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def sample_import():
+    started = time.perf_counter()
+    import streamlit  # noqa: F401
+    result = {"import_streamlit": time.perf_counter() - started}
+    started = time.perf_counter()
+    import ProjKbs  # noqa: F401
+    result["import_app"] = time.perf_counter() - started
+    result["import_app_loaded"] = loaded()
+    return result
+
+
+def sample_render():
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP, default_timeout=120)
+    result = {"preloaded": loaded()}
+    started = time.perf_counter()
+    app.run()
+    result["first_render"] = time.perf_counter() - started
+    result["first_render_loaded"] = loaded()
+    started = time.perf_counter()
+    app.button[0].click().run()
+    result["student_mode"] = time.perf_counter() - started
+    result["student_mode_loaded"] = loaded()
+    started = time.perf_counter()
+    app.sidebar.button[0].click().run()
+    result["submit"] = time.perf_counter() - started
+    result["submit_loaded"] = loaded()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return result
+
+
+def collect(kind, runs, catalog_dir):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--sample", kind],
+                                cwd=catalog_dir, capture_output=True, text=True, check=True,
+                                env=dict(os.environ, PYTHONPATH=os.path.dirname(APP))).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    summary = {}
+    for key, value in samples[0].items():
+        if isinstance(value, float):
+            summary[f"{key}_s_median"] = statistics.median(sample[key] for sample in samples)
+        else:
+            summary[key] = value
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--catalog-dir", default=".", help="directory holding courses.csv (the app's working directory)")
+    parser.add_argument("--sample", choices=("import", "render"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.sample:
+        print(json.dumps(sample_import() if args.sample == "import" else sample_render()))
+        return 0
+    print(json.dumps({"runs": args.runs,
+                      "import": collect("import", args.runs, args.catalog_dir),
+                      "render": collect("render", args.runs, args.catalog_dir)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
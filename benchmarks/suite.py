@@ -0,0 +1,222 @@
+"""Scaling benchmarks for the main entry points on synthetic catalogs.
+
+For each catalog size this times:
+
+* ``kb_load_cold`` / ``kb_load_warm``: ``KnowledgeBase()`` with the catalog
+  cache invalidated / already populated
+* ``catalog_index``: compiling the catalog index
+* ``recommend[<backend>]``: building a recommender and calling
+  ``get_recommendations()`` for one synthetic student
+* ``validate_course``: validating a new course with three prerequisites
+* ``delete_course``: deleting a course nothing depends on (includes saving)
+* ``student_options``: the Student Mode passed/failed picker options
+* ``course_search``: one picker search by course name
+* ``plan_graduation``: GraduationPlanner for one synthetic student (bounded
+  by ``--plan-budget``)
+
+Results are written as JSON. ``--baseline`` compares medians against an
+earlier results file and exits with status 1 when an entry got slower than
+``--tolerance`` allows.
+
+    python -m benchmarks.suite --sizes 50,500,5000,50000 --output bench.json
+    python -m benchmarks.suite --output new.json --baseline bench.json
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+from benchmarks.synthetic import generate_catalog, generate_students
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarize(entry, courses, samples, **extra):
+    result = {
+        "entry": entry,
+        "courses": courses,
+        "repeat": len(samples),
+        "median_ms": statistics.median(samples) * 1000,
+        "min_ms": min(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+    result.update(extra)
+    return result
+
+
+def bench_size(size, args, workdir):
+    results = []
+    df = generate_catalog(size, depth=args.depth, fan_out=args.fan_out, tracks=args.tracks, seed=args.seed)
+    path = os.path.join(workdir, f"catalog_{size}.csv")
+    df.to_csv(path, index=False)
+    repeat = max(1, min(args.repeat, args.repeat * 5000 // size))
+
+    def load_cold():
+        ProjKbs.get_catalog_cache().bump(path)
+        ProjKbs.KnowledgeBase(path)
+
+    results.append(summarize("kb_load_cold", size, timed(load_cold, repeat)))
+    results.append(summarize("kb_load_warm", size, timed(lambda: ProjKbs.KnowledgeBase(path), repeat)))
+
+    kb = ProjKbs.KnowledgeBase(path)
+    results.append(summarize("catalog_index", size, timed(lambda: ProjKbs.CatalogIndex(kb.df), repeat)))
+    index = kb.index
+
+    students = list(generate_students(kb.df, args.students, seed=args.seed, tracks=args.tracks))
+    for backend in args.backends:
+        if backend.startswith("experta") and size > args.experta_max_courses:
+            results.append({"entry": f"recommend[{backend}]", "courses": size,
+                            "skipped": f"catalog larger than --experta-max-courses={args.experta_max_courses}"})
+            continue
+        sample = students if backend in ("native", "optimal") else students[:max(1, len(students) * 500 // size)]
+        queue = iter(sample * 2)
+
+        def recommend():
+            s = next(queue)
+            engine = ProjKbs.make_recommender(s["semester"], s["cgpa"], s["passed"], s["failed"], kb.df,
+                                              ProjKbs.ExplanationSystem(), s["level"], track=s["track"],
+                                              backend=backend, index=index)
+            engine.get_recommendations()
+
+        recommend()  # warm-up (builds engine templates)
+        results.append(summarize(f"recommend[{backend}]", size, timed(recommend, len(sample))))
+
+    codes = kb.df["CourseCode"].tolist()
+    new_course = {
+        "CourseCode": "NEW0001",
+        "CourseName": "Benchmark Course",
+        "Prerequisites": ",".join(codes[-3:]),
+        "CoRequisites": "",
+        "CreditHours": 3,
+        "SemesterOffered": "Fall",
+        "Track": "All",
+        "Level": "4",
+    }
+    results.append(summarize("validate_course", size, timed(lambda: kb.validate_course(new_course), repeat)))
+
+    index = kb.index
+    referenced = {index.codes[cid] for cid in index.prereq_ids.tolist() + index.coreq_ids.tolist()}
+    leaves = iter([code for code in reversed(codes) if code not in referenced])
+    results.append(summarize("delete_course", size, timed(lambda: kb.delete_course(next(leaves)), repeat)))
+
+    interface = ProjKbs.StudentInterface(kb, ProjKbs.ExplanationSystem())
+    passed = codes[: len(codes) // 3]
+
+    def options():
+        interface.picker_options("", [])
+        interface.picker_options("", [], exclude=passed)
+
+    results.append(summarize("student_options", size, timed(options, repeat)))
+
+    names = kb.df["CourseName"].tolist()
+    queries = iter([" ".join(name.lower().split()[-2:]) for name in names[::max(1, len(names) // repeat)]] * 2)
+    results.append(summarize("course_search", size,
+                             timed(lambda: interface.picker_options(next(queries), [], exclude=passed), repeat)))
+
+    plans = iter(students * 2)
+
+    def plan():
+        s = next(plans)
+        ProjKbs.GraduationPlanner(kb.index, s["cgpa"], s["passed"], s["failed"], s["level"], s["semester"],
+                                  track=s["track"], time_budget=args.plan_budget).plan()
+
+    results.append(summarize("plan_graduation", size, timed(plan, min(repeat, len(students)))))
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["entry"], r["courses"]): r for r in json.load(f)["results"] if "median_ms" in r}
+    regressions = []
+    for result in results:
+        before = baseline.get((result["entry"], result["courses"]))
+        if before is None or "median_ms" not in result:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        result["baseline_median_ms"] = before["median_ms"]
+        result["ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(result)
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,500,5000,50000", help="comma-separated catalog sizes")
+    parser.add_argument("--depth", type=int, default=6, help="prerequisite chain depth")
+    parser.add_argument("--fan-out", type=int, default=2, help="maximum prerequisites per course")
+    parser.add_argument("--tracks", type=int, default=3)
+    parser.add_argument("--students", type=int, default=20, help="synthetic students per size")
+    parser.add_argument("--repeat", type=int, default=10, help="repetitions at 5000 courses or fewer")
+    parser.add_argument("--backends", default="native,optimal,experta,experta-fresh")
+    parser.add_argument("--experta-max-courses", type=int, default=5000,
+                        help="skip Experta backends above this catalog size")
+    parser.add_argument("--plan-budget", type=float, default=0.5, help="graduation planner time budget (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    args = parser.parse_args(argv)
+    args.backends = args.backends.split(",")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            for result in bench_size(size, args, workdir):
+                results.append(result)
+                if "median_ms" in result:
+                    print(f"{result['entry']:<26} {size:>7} courses  median {result['median_ms']:10.3f} ms",
+                          file=sys.stderr)
+                else:
+                    print(f"{result['entry']:<26} {size:>7} courses  skipped", file=sys.stderr)
+
+    regressions = compare(results, args.baseline, args.tolerance) if args.baseline else []
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for r in regressions:
+        print(f"REGRESSION {r['entry']} @ {r['courses']} courses: "
+              f"{r['baseline_median_ms']:.3f} -> {r['median_ms']:.3f} ms ({r['ratio']:.2f}x)", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Synthetic catalogs and student populations for benchmarks.
+
+Courses are spread over ``depth`` prerequisite layers; each course outside
+the first layer draws up to ``fan_out`` prerequisites from the layer before
+it, so the longest prerequisite chain is ``depth`` courses. Layers map onto
+``levels`` academic levels. About half of the courses are common ("All"),
+the rest are split across ``tracks`` tracks. The first, "Big Data
+Analytics", also sorts first of them, so it is the app's default track
+(see ``ProjKbs.default_track()``).
+
+    python -m benchmarks.synthetic --courses 5000 --catalog-out catalog.csv \
+        --students 10000 --students-out students.jsonl
+"""
+import argparse
+import json
+import random
+
+import pandas as pd
+
+COLUMNS = ["CourseCode", "CourseName", "Prerequisites", "CoRequisites", "CreditHours",
+           "SemesterOffered", "Track", "Level"]
+TRACK_NAMES = ["Big Data Analytics", "Software Engineering", "Cyber Security", "Computer Graphics"]
+
+
+def track_names(tracks):
+    return [TRACK_NAMES[t] if t < len(TRACK_NAMES) else f"Track {t + 1}" for t in range(tracks)]
+
+
+def generate_catalog(courses, depth=4, fan_out=2, tracks=3, levels=4, coreq_rate=0.0, seed=0):
+    rng = random.Random(seed)
+    names = track_names(tracks)
+    width = len(str(courses))
+    codes = [f"S{i:0{width}d}" for i in range(courses)]
+    layers = [i * depth // courses for i in range(courses)]
+    layer_members = [[] for _ in range(depth)]
+    for i, layer in enumerate(layers):
+        layer_members[layer].append(i)
+
+    rows = []
+    for i, code in enumerate(codes):
+        layer = layers[i]
+        prereqs = []
+        if layer > 0:
+            previous = layer_members[layer - 1]
+            prereqs = rng.sample(previous, min(len(previous), rng.randint(0, fan_out)))
+        coreqs = []
+        same_layer = [j for j in layer_members[layer] if j < i]
+        if same_layer and rng.random() < coreq_rate:
+            coreqs.append(rng.choice(same_layer))
+        rows.append((
+            code,
+            f"Synthetic Course {i}",
+            ",".join(codes[j] for j in prereqs),
+            ",".join(codes[j] for j in coreqs),
+            rng.choice([2, 3, 3, 3, 4]),
+            rng.choice(["Fall", "Spring", "Both"]),
+            "All" if rng.random() < 0.5 else rng.choice(names),
+            1 + layer * levels // depth,
+        ))
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def generate_students(df, count, seed=0, tracks=3):
+    """Yield student profiles whose passed courses mostly sit below their level."""
+    rng = random.Random(seed)
+    names = track_names(tracks)
+    codes = df["CourseCode"].tolist()
+    levels = [int(level) for level in df["Level"].tolist()]
+    for n in range(count):
+        level = rng.randint(1, max(levels) if levels else 4)
+        passed = [c for c, lv in zip(codes, levels) if (lv < level and rng.random() < 0.85) or rng.random() < 0.02]
+        passed_set = set(passed)
+        remaining = [c for c in codes if c not in passed_set]
+        failed = rng.sample(remaining, min(len(remaining), rng.choice([0, 0, 1, 2, 3])))
+        yield {
+            "student_id": f"STU{n:06d}",
+            "semester": rng.choice(["Fall", "Spring"]),
+            "cgpa": round(rng.uniform(1.0, 4.0), 2),
+            "level": str(level),
+            "passed": passed,
+            "failed": failed,
+            "track": rng.choice(names),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fan-out", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=3)
+    parser.add_argument("--levels", type=int, default=4)
+    parser.add_argument("--coreq-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--catalog-out", default="synthetic_courses.csv")
+    parser.add_argument("--students", type=int, default=0)
+    parser.add_argument("--students-out", default="synthetic_students.jsonl")
+    args = parser.parse_args(argv)
+
+    df = generate_catalog(args.courses, depth=args.depth, fan_out=args.fan_out, tracks=args.tracks,
+                          levels=args.levels, coreq_rate=args.coreq_rate, seed=args.seed)
+    df.to_csv(args.catalog_out, index=False)
+    if args.students:
+        with open(args.students_out, "w", encoding="utf-8") as f:
+            for student in generate_students(df, args.students, seed=args.seed, tracks=args.tracks):
+                f.write(json.dumps(student) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Move catalogs between CSV files and the SQLite catalog store.
+
+One SQLite database can hold the catalogs of several programs; the app
+serves the one named by ADVISOR_PROGRAM when ADVISOR_CATALOG_STORE=sqlite.
+CSV stays the import/export format and is parsed exactly as the app parses
+courses.csv.
+
+``bulk-import`` adds the courses of a CSV or JSON file to the app's catalog
+(either store) after validating every row; see ``ProjKbs.validate_course_rows``.
+With any invalid row nothing is written and the errors are printed (or saved
+with ``--report``), and the command exits with status 1.
+
+    python catalog_admin.py import courses.csv --db catalog.db --program cse
+    python catalog_admin.py export cse_courses.csv --db catalog.db --program cse
+    python catalog_admin.py programs --db catalog.db
+    python catalog_admin.py bulk-import new_courses.json --dry-run --report errors.csv
+    python catalog_admin.py bulk-import spring.csv --store sqlite --replace
+"""
+import argparse
+import logging
+import sys
+
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+
+def bulk_import(args):
+    store = ProjKbs.make_catalog_store(args.catalog, kind=args.store, db_path=args.db, program=args.program)
+    kb = ProjKbs.KnowledgeBase(args.catalog, store=store)
+    try:
+        courses, report = kb.import_courses(args.csv, replace=args.replace, dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"Cannot import {args.csv}: {e}", file=sys.stderr)
+        return 1
+    if args.report:
+        report.to_csv(args.report, index=False)
+    if not report.empty:
+        if not args.report:
+            for row in report.itertuples(index=False):
+                print(f"row {row.Row} {row.CourseCode}: {row.Error}", file=sys.stderr)
+        print(f"{len(report)} problems in {report['Row'].nunique()} rows; nothing was imported", file=sys.stderr)
+        return 1
+    if args.dry_run:
+        print(f"All {len(courses)} courses in {args.csv} are valid", file=sys.stderr)
+    else:
+        print(f"Imported {len(courses)} courses into {store.label}", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["import", "export", "programs", "bulk-import"])
+    parser.add_argument("csv", nargs="?", help="CSV file to import from or export to (CSV or JSON for bulk-import)")
+    parser.add_argument("--db", default="catalog.db", help="SQLite catalog database")
+    parser.add_argument("--program", default="cse", help="program whose catalog to import or export")
+    parser.add_argument("--catalog", default="courses.csv", help="bulk-import: the app's catalog CSV")
+    parser.add_argument("--store", choices=sorted(ProjKbs.CATALOG_STORES), default=None,
+                        help="bulk-import: catalog store (default: ADVISOR_CATALOG_STORE or csv)")
+    parser.add_argument("--replace", action="store_true", help="bulk-import: replace the catalog instead of adding to it")
+    parser.add_argument("--dry-run", action="store_true", help="bulk-import: validate only")
+    parser.add_argument("--report", help="bulk-import: write the error report to this CSV")
+    args = parser.parse_args(argv)
+
+    if args.command != "programs" and not args.csv:
+        parser.error(f"{args.command} needs a CSV path")
+    if args.command == "bulk-import":
+        # Only touches the SQLite database when --store sqlite is chosen.
+        return bulk_import(args)
+    store = ProjKbs.SqliteCatalogStore(args.db, args.program)
+    if args.command == "programs":
+        for program in store.programs():
+            print(program)
+        return 0
+    if args.command == "import":
+        df = store.import_csv(args.csv)
+        print(f"Imported {len(df)} courses into {store.label}", file=sys.stderr)
+    else:
+        if not store.exists():
+            print(f"No catalog for program '{args.program}' in {args.db}", file=sys.stderr)
+            return 1
+        df = store.export_csv(args.csv)
+        print(f"Exported {len(df)} courses from {store.label}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Differential check between the recommender backends.
+
+Generates random student profiles (and optionally random catalogs that
+exercise co-requisites, which the shipped catalog does not use), runs every
+backend on each and compares the recommended courses and the explanation
+strings with the first (reference) backend, by default a fresh Experta
+RecommendationEngine. Exits with status 1 if any profile disagrees.
+
+Timings are per profile and per backend, in two parts: ``build`` is
+make_recommender() and ``run`` is get_recommendations(). ``experta-fresh``
+builds its engine and declares the Course facts in ``build``; the pooled
+``experta`` backend checks out its template and declares the student's facts
+in ``run``.
+
+    python equivalence_check.py --profiles 5000
+    python equivalence_check.py --profiles 200 --synthetic-catalogs 25
+
+``test_backends_agree`` runs a smaller check under pytest:
+
+    python -m pytest equivalence_check.py
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+import streamlit.logger
+
+streamlit.logger.set_log_level("error")
+
+import ProjKbs
+
+logging.getLogger(ProjKbs.__name__).setLevel(logging.WARNING)
+
+TRACKS = ["All", "Big Data Analytics", "Software Engineering"]
+CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "courses.csv")
+
+
+def random_catalog(rng, size):
+    rows = []
+    for i in range(size):
+        level = 1 + i * 4 // size
+        earlier = list(range(i))
+        prereqs = [f"C{j:04d}" for j in rng.sample(earlier, min(len(earlier), rng.choice([0, 0, 1, 1, 2, 3])))]
+        coreqs = []
+        if earlier and rng.random() < 0.25:
+            coreqs.append(f"C{rng.choice(earlier):04d}")
+        if i + 1 < size and rng.random() < 0.15:
+            coreqs.append(f"C{rng.randrange(i + 1, size):04d}")
+        if rng.random() < 0.05:
+            prereqs.append("EXT999")
+        rows.append({
+            "CourseCode": f"C{i:04d}",
+            "CourseName": f"Course {i}",
+            "Prerequisites": ",".join(prereqs),
+            "CoRequisites": ",".join(coreqs),
+            "CreditHours": rng.choice([2, 3, 3, 3, 4]),
+            "SemesterOffered": rng.choice(["Fall", "Spring", "Both"]),
+            "Track": rng.choice(TRACKS),
+            "Level": rng.choice([level, str(level)]),
+        })
+    return pd.DataFrame(rows, columns=ProjKbs.KnowledgeBase.required_columns)
+
+
+def random_profile(rng, df):
+    codes = df["CourseCode"].tolist()
+    levels = [ProjKbs._level_number(v) for v in df["Level"].tolist()]
+    level = rng.randint(1, 4)
+    below = [c for c, lv in zip(codes, levels) if lv < level]
+    at_or_above = [c for c, lv in zip(codes, levels) if lv >= level]
+    passed = [c for c in below if rng.random() < 0.85] + [c for c in at_or_above if rng.random() < 0.1]
+    rest = [c for c in codes if c not in passed]
+    failed = rng.sample(rest, min(len(rest), rng.choice([0, 0, 1, 2, 3, 5])))
+    if passed and rng.random() < 0.05:
+        failed.append(rng.choice(passed))
+    if rng.random() < 0.05:
+        passed.append("EXT999")
+    rng.shuffle(passed)
+    return {
+        "semester": rng.choice(["Fall", "Spring"]),
+        "cgpa": rng.choice([0.0, 1.9, 2.0, 2.9, 3.0, 4.0, round(rng.uniform(0, 4), 2)]),
+        "level": str(level),
+        "passed": passed,
+        "failed": failed,
+        "track": rng.choice(["Big Data Analytics", "Big Data Analytics", "Software Engineering"]),
+    }
+
+
+def run(backend, df, index, profile):
+    explanations = ProjKbs.ExplanationSystem()
+    started = time.perf_counter()
+    engine = ProjKbs.make_recommender(profile["semester"], profile["cgpa"], profile["passed"], profile["failed"],
+                                      df, explanations, profile["level"], track=profile["track"],
+                                      backend=backend, index=index)
+    built = time.perf_counter()
+    recommendations = [list(r) for r in engine.get_recommendations()]
+    return recommendations, explanations.explanations, (built - started, time.perf_counter() - built)
+
+
+def check(df, profiles, rng, label, backends, show=3):
+    index = ProjKbs.get_catalog_index(df)
+    reference = backends[0]
+    mismatches = 0
+    timings = {backend: [0.0, 0.0] for backend in backends}
+    for _ in range(profiles):
+        profile = random_profile(rng, df)
+        expected, expected_exp, elapsed = run(reference, df, index, profile)
+        add_timings(timings[reference], elapsed)
+        for backend in backends[1:]:
+            actual, actual_exp, elapsed = run(backend, df, index, profile)
+            add_timings(timings[backend], elapsed)
+            if expected != actual or expected_exp != actual_exp:
+                mismatches += 1
+                if mismatches <= show:
+                    print(f"[{label}] {backend} disagrees with {reference} for {profile}")
+                    print(f"  {reference}: {expected}")
+                    print(f"  {backend}: {actual}")
+                    if expected_exp != actual_exp:
+                        print(f"  {reference} explanations: {expected_exp}")
+                        print(f"  {backend} explanations: {actual_exp}")
+    per_profile = ", ".join(f"{b} {build / profiles * 1000:.2f} + {run_ / profiles * 1000:.2f}"
+                            for b, (build, run_) in timings.items())
+    print(f"[{label}] {profiles} profiles, {mismatches} mismatches, "
+          f"ms/profile build + run: {per_profile}")
+    return mismatches
+
+
+def add_timings(total, elapsed):
+    total[0] += elapsed[0]
+    total[1] += elapsed[1]
+
+
+def test_backends_agree():
+    rng = random.Random(0)
+    backends = ["experta-fresh", "experta", "native"]
+    assert check(ProjKbs.KnowledgeBase(CATALOG).df, 100, rng, "courses.csv", backends) == 0
+    for i in range(2):
+        assert check(random_catalog(rng, 60), 100, rng, f"synthetic-{i}", backends) == 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", default="courses.csv", help="catalog CSV to check against")
+    parser.add_argument("--profiles", type=int, default=2000, help="random profiles per catalog")
+    parser.add_argument("--synthetic-catalogs", type=int, default=0,
+                        help="also check this many random catalogs (with co-requisites)")
+    parser.add_argument("--synthetic-size", type=int, default=60, help="courses per random catalog")
+    parser.add_argument("--backends", default="experta-fresh,experta,native",
+                        help="comma-separated backends; the first is the reference")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    backends = args.backends.split(",")
+    rng = random.Random(args.seed)
+    mismatches = check(ProjKbs.KnowledgeBase(args.catalog).df, args.profiles, rng, args.catalog, backends)
+    for i in range(args.synthetic_catalogs):
+        df = random_catalog(rng, args.synthetic_size)
+        mismatches += check(df, args.profiles, rng, f"synthetic-{i}", backends)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
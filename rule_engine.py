@@ -0,0 +1,273 @@
+"""The Experta rule engine behind the ``experta`` recommender backends.
+
+Importing this module imports Experta, so the app only imports it from
+``ProjKbs.get_rule_engine()``, on the first Experta recommendation; the
+welcome page and the native backends never load it.
+
+The engine calls back into the app for the catalog index, the student's
+default track, credit limits, traces and explanations. The app runs as
+``__main__`` under ``streamlit run`` and cannot be imported from here, so
+``get_rule_engine()`` hands its module to ``bind()`` first.
+"""
+import functools
+import logging
+
+from experta import DefFacts, Fact, InitialFact, KnowledgeEngine, MATCH, Rule, TEST
+from experta.strategies import DepthStrategy
+import experta.watchers
+
+logger = logging.getLogger(__name__)
+
+# experta's watcher loggers log every fact and firing at INFO and rely on
+# the root level to stay quiet; keep them off unless watch() is called.
+experta.watchers.unwatch()
+
+# The app module; see bind().
+app = None
+
+
+def bind(module):
+    global app
+    app = module
+
+
+class TracingDepthStrategy(DepthStrategy):
+    """Experta's default conflict resolution, counting activations per rule
+    and the agenda high-water mark into the engine's trace."""
+    trace = None
+
+    def _update_agenda(self, agenda, added, removed):
+        super()._update_agenda(agenda, added, removed)
+        trace = self.trace
+        if trace is not None:
+            for act in added:
+                trace.rule_activations[getattr(act.rule, "__name__", "anonymous")] += 1
+            trace.max_agenda_size = max(trace.max_agenda_size, len(agenda.activations))
+
+
+class Course(Fact):
+    pass
+
+
+class Student(Fact):
+    pass
+
+
+class RecommendationState(Fact):
+    pass
+
+
+class RecommendationEngine(KnowledgeEngine):
+    __strategy__ = TracingDepthStrategy
+
+    def __init__(self, semester, cgpa, passed_courses, failed_courses, kb, explanation_system, level, track=None, index=None, trace=None):
+        super().__init__()
+        self.set_trace(trace or app.AdvisingTrace("experta-fresh"))
+        self.semester = semester
+        self.cgpa = cgpa
+        self.passed_courses = passed_courses or []
+        self.failed_courses = failed_courses or []
+        self.kb = kb
+        self.explanation_system = explanation_system
+        self.track = track
+        self.level = level
+        self.state = None
+        self.selected_courses = []
+
+        self.is_template = False
+
+        try:
+            with self.trace.phase("declare"):
+                self.index = index if index is not None else app.get_catalog_index(kb)
+                if self.track is None:
+                    self.track = app.default_track(self.index)
+                self.reset()
+                self._declare_student()
+                self._declare_courses()
+        except Exception as e:
+            logger.error(f"Error initializing RecommendationEngine: {str(e)}")
+            self.trace.error(f"Failed to initialize recommendation engine: {str(e)}")
+
+    @classmethod
+    def template(cls, kb, index, semester, track):
+        """Build an engine holding only the Course facts for one
+        (semester, track, catalog version); see ``prepare()``."""
+        engine = cls.__new__(cls)
+        KnowledgeEngine.__init__(engine)
+        engine.set_trace(app.AdvisingTrace("template"))
+        engine.semester = semester
+        engine.track = track
+        engine.kb = kb
+        engine.index = index
+        engine.state = None
+        engine.selected_courses = []
+        engine.is_template = True
+        engine.reset()
+        engine._declare_courses()
+        return engine
+
+    def set_trace(self, trace):
+        self.trace = trace
+        self.strategy.trace = trace
+
+    def prepare(self, cgpa, passed_courses, failed_courses, explanation_system, level):
+        """Declare one student's facts on a template engine."""
+        self.cgpa = cgpa
+        self.passed_courses = passed_courses or []
+        self.failed_courses = failed_courses or []
+        self.explanation_system = explanation_system
+        self.level = level
+        try:
+            self.declare(Fact(credit_limit=app.credit_limit_for(cgpa)))
+        except Exception as e:
+            logger.error(f"Error in _initial_facts: {str(e)}")
+        self._declare_student()
+
+    def clear_student(self):
+        """Retract everything ``prepare()`` and the rules declared, leaving
+        the template's Course facts in place."""
+        for fact in [f for f in self.facts.values() if not isinstance(f, (Course, InitialFact))]:
+            self.retract(fact)
+        self.explanation_system = None
+        self.state = None
+        self.selected_courses = []
+
+    def _declare_student(self):
+        self.declare(Student(
+            cgpa=self.cgpa,
+            passed=self.passed_courses,
+            failed=self.failed_courses,
+            passed_mask=self.index.mask_of(self.passed_courses),
+            failed_mask=self.index.mask_of(self.failed_courses),
+            level=self.level
+        ))
+        # The rules update this fact in place of searching the fact list;
+        # the selected courses themselves are kept on the engine.
+        self.state = self.declare(RecommendationState(total_credits=0, selected_mask=0))
+        self.selected_courses = []
+
+    def _declare_courses(self):
+        if not self.kb.empty:
+            index = self.index
+            offered_ids = index.offered_ids(self.semester, self.track)
+            self.trace.courses_declared = len(offered_ids)
+            for cid in offered_ids:
+                # Only what the rules test; names and codes are read from the index when a rule fires.
+                self.declare(Course(
+                    cid=cid,
+                    prereq_mask=index.prereq_masks[cid],
+                    coreq_mask=index.coreq_masks[cid],
+                    credits=index.credit_values[cid],
+                    level_num=int(index.levels[cid])
+                ))
+        else:
+            logger.warning("Knowledge base is empty. No courses to declare.")
+
+    @DefFacts()
+    def _initial_facts(self):
+        if self.is_template:
+            # Template engines get the credit limit per student in prepare().
+            return
+        try:
+            yield Fact(credit_limit=app.credit_limit_for(self.cgpa))
+        except Exception as e:
+            logger.error(f"Error in _initial_facts: {str(e)}")
+
+    # Tests that only depend on the course and the student come before the
+    # RecommendationState pattern, so updating the state re-matches just
+    # the courses that passed them.
+    @Rule(
+        Fact(credit_limit=MATCH.limit),
+        Student(passed_mask=MATCH.passed_mask, failed_mask=MATCH.failed_mask, level=MATCH.student_level),
+        Course(
+            cid=MATCH.cid,
+            prereq_mask=MATCH.prereq_mask,
+            coreq_mask=MATCH.coreq_mask,
+            credits=MATCH.credits,
+            level_num=MATCH.course_level_num
+        ),
+        TEST(lambda cid, failed_mask: failed_mask >> cid & 1),
+        TEST(lambda prereq_mask, passed_mask: not prereq_mask & ~passed_mask),
+        TEST(lambda course_level_num, student_level: course_level_num <= int(student_level)),
+        RecommendationState(total_credits=MATCH.total_credits, selected_mask=MATCH.selected_mask),
+        TEST(lambda coreq_mask, passed_mask, selected_mask: not coreq_mask & ~(passed_mask | selected_mask)),
+        TEST(lambda credits, limit, total_credits: total_credits + credits <= limit),
+        TEST(lambda cid, selected_mask: not selected_mask >> cid & 1),
+        salience=5
+    )
+    def recommend_failed_course(self, cid, credits, total_credits, selected_mask):
+        self.trace.rule_firings["recommend_failed_course"] += 1
+        try:
+            code, name, course_level = self.index.codes[cid], self.index.names[cid], self.index.level_values[cid]
+            self._select(cid, credits, total_credits, selected_mask)
+            self.explanation_system.add(app.Explanation(code, "failed", (), (), course_level, self.level))
+            logger.debug("Recommended failed course: %s", code)
+        except Exception as e:
+            logger.error(f"Error in recommend_failed_course: {str(e)}")
+            self.trace.error(f"Error recommending failed course: {str(e)}")
+
+    @Rule(
+        Fact(credit_limit=MATCH.limit),
+        Student(passed_mask=MATCH.passed_mask, failed_mask=MATCH.failed_mask, level=MATCH.student_level),
+        Course(
+            cid=MATCH.cid,
+            prereq_mask=MATCH.prereq_mask,
+            coreq_mask=MATCH.coreq_mask,
+            credits=MATCH.credits,
+            level_num=MATCH.course_level_num
+        ),
+        TEST(lambda cid, passed_mask, failed_mask: not (passed_mask | failed_mask) >> cid & 1),
+        TEST(lambda prereq_mask, passed_mask: not prereq_mask & ~passed_mask),
+        TEST(lambda course_level_num, student_level: course_level_num <= int(student_level)),
+        RecommendationState(total_credits=MATCH.total_credits, selected_mask=MATCH.selected_mask),
+        TEST(lambda coreq_mask, passed_mask, selected_mask: not coreq_mask & ~(passed_mask | selected_mask)),
+        TEST(lambda credits, limit, total_credits: total_credits + credits <= limit),
+        TEST(lambda cid, selected_mask: not selected_mask >> cid & 1),
+        salience=5
+    )
+    def recommend_new_course(self, cid, credits, total_credits, selected_mask):
+        self.trace.rule_firings["recommend_new_course"] += 1
+        try:
+            index = self.index
+            code, course_level, prereqs = index.codes[cid], index.level_values[cid], index.prereq_raw[cid]
+            self._select(cid, credits, total_credits, selected_mask)
+            self.explanation_system.add(app.Explanation(code, "new", tuple(prereqs), (), course_level, self.level))
+            logger.debug("Recommended new course: %s", code)
+        except Exception as e:
+            logger.error(f"Error in recommend_new_course: {str(e)}")
+            self.trace.error(f"Error recommending new course: {str(e)}")
+
+    def _select(self, cid, credits, total_credits, selected_mask):
+        """Add a course to the recommendations and update the state fact."""
+        if self.state is None:
+            raise RuntimeError("RecommendationState not found")
+        index = self.index
+        self.selected_courses.append([index.codes[cid], index.names[cid], credits, index.level_values[cid]])
+        self.state = self.modify(self.state, total_credits=total_credits + credits,
+                                 selected_mask=selected_mask | 1 << cid)
+        self.trace.state_modifications += 1
+
+    def get_recommendations(self):
+        try:
+            with self.trace.phase("run"):
+                self.run()
+            self.explanation_system.defer(functools.partial(
+                app.unavailable_explanations, self.index, self.semester, self.track,
+                self.index.mask_of(self.passed_courses)))
+            if self.state is None:
+                logger.warning("No RecommendationState fact found in get_recommendations")
+                return []
+            seen_codes = set()
+            unique_courses = []
+            for course in self.selected_courses:
+                code = course[0]
+                if code not in seen_codes:
+                    seen_codes.add(code)
+                    unique_courses.append(course)
+            self.trace.recommendations = len(unique_courses)
+            logger.debug("Returning deduplicated recommendations: %s", unique_courses)
+            return unique_courses
+        except Exception as e:
+            logger.error(f"Error getting recommendations: {str(e)}")
+            self.trace.error(f"Failed to get recommendations: {str(e)}")
+            return []
@@ -0,0 +1,164 @@
+"""Publish the app stylesheet and background image as static assets.
+
+``build()`` writes content-hashed files into ``static/``, which Streamlit
+serves at ``app/static/`` when ``server.enableStaticServing`` is on (see
+``.streamlit/config.toml``). A file's name changes whenever its content
+changes, so browsers and proxies can cache the files indefinitely. The page
+itself only carries a one-line ``@import`` of the stylesheet.
+
+The background is re-encoded from ``111.png`` as WebP with a JPEG fallback,
+in a full-size and a small-screen variant. ``build()`` is a no-op while the
+sources are unchanged. Run this module to build ahead of deployment:
+
+    python static_assets.py
+"""
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_CSS = os.path.join(APP_DIR, "assets", "style.css")
+SOURCE_IMAGE = os.path.join(APP_DIR, "111.png")
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_URL = "app/static"
+MANIFEST = "assets-manifest.json"
+BUILD_VERSION = "1"
+
+BACKGROUND_SELECTORS = '[data-testid="stAppViewContainer"],\n[data-testid="stSidebar"]'
+# (label, width in px, max viewport width the variant is used for)
+BACKGROUND_VARIANTS = (("large", 1536, None), ("small", 768, 800))
+
+
+def _digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _hashed_name(stem, extension, data):
+    return f"{stem}.{_digest(data)[:12]}.{extension}"
+
+
+def _write_atomic(path, data):
+    if os.path.exists(path):
+        return
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _encode_backgrounds(image_bytes):
+    import io
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    files = {}
+    for label, width, _ in BACKGROUND_VARIANTS:
+        variant = image
+        if image.width > width:
+            variant = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        for extension, options in (("webp", {"quality": 80, "method": 6}),
+                                   ("jpg", {"quality": 80, "optimize": True, "progressive": True})):
+            buffer = io.BytesIO()
+            variant.save(buffer, "WEBP" if extension == "webp" else "JPEG", **options)
+            files[(label, extension)] = buffer.getvalue()
+    return files
+
+
+def _background_rules(names):
+    rules = []
+    for label, _, max_width in BACKGROUND_VARIANTS:
+        webp, jpg = names[(label, "webp")], names[(label, "jpg")]
+        rule = (f"{BACKGROUND_SELECTORS} {{\n"
+                f"    background-image: url(\"{jpg}\");\n"
+                f"    background-image: image-set(url(\"{webp}\") type(\"image/webp\"), "
+                f"url(\"{jpg}\") type(\"image/jpeg\"));\n"
+                f"}}\n")
+        if max_width:
+            rule = f"@media (max-width: {max_width}px) {{\n{rule}}}\n"
+        rules.append(rule)
+    return "".join(rules)
+
+
+def _remove_stale(static_dir, current):
+    for name in os.listdir(static_dir):
+        if name.startswith(("style.", "background-")) and name not in current:
+            os.remove(os.path.join(static_dir, name))
+
+
+def read_manifest(static_dir=STATIC_DIR):
+    try:
+        with open(os.path.join(static_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build(source_css=SOURCE_CSS, source_image=SOURCE_IMAGE, static_dir=STATIC_DIR):
+    """Publish the assets if their sources changed and return the manifest."""
+    with open(source_css, "rb") as f:
+        css = f.read()
+    image = None
+    if os.path.exists(source_image):
+        with open(source_image, "rb") as f:
+            image = f.read()
+    else:
+        logger.error(f"Background image '{source_image}' not found; publishing the stylesheet without it")
+    source = _digest(BUILD_VERSION.encode() + css + (image or b""))
+
+    manifest = read_manifest(static_dir)
+    if manifest and manifest.get("source") == source and all(
+            os.path.exists(os.path.join(static_dir, name)) for name in manifest["files"]):
+        return manifest
+
+    os.makedirs(static_dir, exist_ok=True)
+    files = {}
+    names = {}
+    if image is not None:
+        for (label, extension), data in _encode_backgrounds(image).items():
+            name = _hashed_name(f"background-{label}", extension, data)
+            names[(label, extension)] = name
+            files[name] = data
+        css = css + b"\n" + _background_rules(names).encode()
+    stylesheet = _hashed_name("style", "css", css)
+    files[stylesheet] = css
+
+    for name, data in files.items():
+        _write_atomic(os.path.join(static_dir, name), data)
+    manifest = {
+        "source": source,
+        "stylesheet": stylesheet,
+        "files": {name: len(data) for name, data in files.items()},
+    }
+    _write_atomic_json(os.path.join(static_dir, MANIFEST), manifest)
+    _remove_stale(static_dir, files)
+    logger.info(f"Published static assets: {manifest['files']}")
+    return manifest
+
+
+def _write_atomic_json(path, obj):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def stylesheet_tag(manifest):
+    """The only styling markup sent with each page render."""
+    return f'<style>@import url("{STATIC_URL}/{manifest["stylesheet"]}");</style>'
+
+
+def inline_stylesheet_tag():
+    """Fallback when static serving is disabled: the stylesheet inline, without
+    the background image."""
+    with open(SOURCE_CSS, encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    built = build()
+    for name, size in built["files"].items():
+        print(f"static/{name}  {size / 1024:.1f} KiB")